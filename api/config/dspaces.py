@@ -1,15 +1,73 @@
+from typing import Literal
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
 import socket
 
 
 class DSpacesSettings(BaseSettings):
-    dspaces_server_ip:str = socket.getaddrinfo('dspaces', None)[0][-1][0]
+    dspaces_server_host:str = 'dspaces'
+    dspaces_server_ip:str | None = None
     dspaces_server_port:int = 4000
     dspaces_unsafe_endpoints:bool = False
+    dspaces_backend:Literal['server', 'embedded'] = 'server'
+    dspaces_config_file:str = 'dspaces.toml'
+    dspaces_warmup_connections:int = 4
+    dspaces_warmup_timeout:float = 10.0
+    dspaces_ready_timeout:float = 2.0
+    dspaces_stream_chunk_size:int = 1 << 20
+    dspaces_compress_min_bytes:int = 64 << 10
+    dspaces_gzip_level:int = 1
+    dspaces_zstd_level:int = 3
+    dspaces_batch_max_items:int = 1024
+    dspaces_fn_cache_size:int = 128
+    dspaces_exec_processes:int = 0
+    dspaces_exec_timeout:float = 60.0
+    dspaces_batch_put_concurrency:int = 8
+    dspaces_pool_size:int | None = None
+    dspaces_pool_timeout:float = 30.0
+    dspaces_pool_probe_interval:float = 60.0
+    dspaces_pool_retries:int = 1
+    dspaces_executor_workers:int = 32
+    dspaces_cache_bytes:int = 256 << 20
+    dspaces_etag_memo_size:int = 4096
+    dspaces_immutable_reads:bool = False
+    dspaces_read_max_age:int = 31536000
+    dspaces_max_get_timeout:int = 30000
+    dspaces_watch_interval:float = 1.0
+    dspaces_watch_queue_size:int = 256
+    dspaces_watch_heartbeat:float = 15.0
+    dspaces_replay_window:int = 8
+    dspaces_index_ttl:float = 5.0
+    dspaces_coverage_max_cells:int = 1 << 22
+    dspaces_listing_ttl:float = 5.0
+    dspaces_listing_max_limit:int = 10000
+    dspaces_op_limits:dict[str, int] = {
+        'Get': 16,
+        'Put': 4,
+        'GetVars': 2,
+        'GetVarObjs': 2,
+        'Exec': 2,
+        'VecExec': 2,
+        'Register': 2
+    }
+
+    @model_validator(mode='after')
+    def check_pool_size(self):
+        # every op that gets past its own limit must find a pooled client, or
+        # the limits no longer keep one kind of call from starving the others
+        needed = sum(self.dspaces_op_limits.values())
+        if self.dspaces_pool_size is None:
+            self.dspaces_pool_size = needed
+        elif self.dspaces_pool_size < needed:
+            raise ValueError(f'dspaces_pool_size ({self.dspaces_pool_size}) must be at least the sum of dspaces_op_limits ({needed})')
+        return self
 
     @property
     def dspaces_connector(self) -> str:
-        return f'tcp://{self.dspaces_server_ip}:{self.dspaces_server_port}'
+        # resolved when a connection is made rather than at import, so that
+        # startup never waits on DNS and a server that isn't up yet is retried
+        ip = self.dspaces_server_ip or socket.getaddrinfo(self.dspaces_server_host, None)[0][-1][0]
+        return f'tcp://{ip}:{self.dspaces_server_port}'
 
     model_config = {
         "env_file": ".env",
@@ -1,2 +1,10 @@
+from api.config import dspaces_settings
+from api.helpers.readiness import get_readiness
+
 async def configure_services():
-    pass
+    # open backend connections before the first request, without letting an
+    # unreachable backend hold up startup for longer than the warm-up timeout
+    await get_readiness().warm_up(
+        dspaces_settings.dspaces_warmup_connections,
+        dspaces_settings.dspaces_warmup_timeout
+    )
\ No newline at end of file
@@ -1,8 +1,21 @@
 import math
+from typing import NamedTuple
 
-from api.models import Interval, BoundingBox
+from api.models import BoundingBox
 
-def get_corners_from_bounds(box: BoundingBox):
+class Corners(NamedTuple):
+    '''
+    A box given directly by its inclusive lower and upper corners
+
+    This is the form the services work in, so requests that give their box \
+        in the compact syntax are parsed straight into it, without building \
+        a BoundingBox of Interval models. It can be passed anywhere a \
+        BoundingBox is accepted.
+    '''
+    lb: tuple[int, ...]
+    ub: tuple[int, ...]
+
+def get_corners_from_bounds(box: BoundingBox | Corners):
     '''
     Convert bounding box start and span list into upper and lower bounds
 
@@ -15,30 +28,30 @@ def get_corners_from_bounds(box: BoundingBox):
     -------
     Two tuples of length n, containing the lower and upper bounds of box
     '''
+    if isinstance(box, Corners):
+        return box
     lb = tuple([b.start for b in box.bounds])
     ub = tuple([(b.start+b.span)-1 for b in box.bounds])
     return (lb,ub)
 
-def get_bounds_from_corners(lb = tuple[int], ub = tuple[int]) -> list[Interval]:
+def get_box_dims(box: BoundingBox | Corners) -> list[int]:
     '''
-    Convert upper and lower bounds into start and span list
+    Get the extent of a box in each dimension
 
     Parameters
     ----------
-    lb
-        Contains a list of lower bound coordinates
-    ub
-        Contains a list of upper bound coordinates (must be same length as lb)
+    box
+        Contains a list of start, span pairs in order to define an extent in n-dimensional space
 
     Returns
     -------
-    A list of start/span pairs that define the bounding box
+    The span of box in each dimension
     '''
-    if len(lb) != len(ub):
-        raise ValueError('lb and ub must have same length')
-    return [Interval(start=a, span=(b-a)+1) for a,b in zip(lb, ub)]
+    if isinstance(box, Corners):
+        return [b-a+1 for a,b in zip(box.lb, box.ub)]
+    return [b.span for b in box.bounds]
 
-def get_box_volume(box: BoundingBox) -> int:
+def get_box_volume(box: BoundingBox | Corners) -> int:
     '''
     Get the number of elements spanned by a box
 
@@ -51,4 +64,68 @@ def get_box_volume(box: BoundingBox) -> int:
     -------
     The product of the spans of box
     '''
-    return math.prod([b.span for b in box.bounds])
\ No newline at end of file
+    return math.prod(get_box_dims(box))
+
+def parse_corners(lb: str, ub: str) -> Corners:
+    '''
+    Parse comma-separated lower and upper bounds into a bounding box
+
+    Parameters
+    ----------
+    lb
+        A comma-separated list of lower bound coordinates, e.g. "0,0,0"
+    ub
+        A comma-separated list of upper bound coordinates (must be same length as lb)
+
+    Returns
+    -------
+    The bounding box spanning lb to ub, inclusive
+
+    Raises
+    ------
+    ValueError
+        If the bounds are malformed or of different lengths
+    '''
+    lb = tuple([int(x) for x in lb.split(',')])
+    ub = tuple([int(x) for x in ub.split(',')])
+    if len(lb) != len(ub):
+        raise ValueError('lb and ub must have same length')
+    if any([b < a for a,b in zip(lb, ub)]):
+        raise ValueError('upper bounds must not be less than lower bounds')
+    return Corners(lb, ub)
+
+def parse_box(value: str) -> Corners:
+    '''
+    Parse the compact box syntax
+
+    Parameters
+    ----------
+    value
+        A comma-separated list of start:span pairs, one per dimension. For \
+            example, "1:2,3:4" is the rectangle that starts at (1,3) and has \
+            dimensions 2x4, the same box as {"bounds": [{"start": 1, \
+            "span": 2}, {"start": 3, "span": 4}]}.
+
+    Returns
+    -------
+    The corners of the box
+
+    Raises
+    ------
+    ValueError
+        If the box is malformed, or a start or span is out of the range \
+            allowed for an Interval
+    '''
+    lb = []
+    ub = []
+    for item in value.split(','):
+        start, sep, span = item.partition(':')
+        if not sep:
+            raise ValueError(f"malformed box interval '{item}', expected start:span")
+        start = int(start)
+        span = int(span)
+        if start < -1 or span < 0:
+            raise ValueError(f"invalid box interval '{item}'")
+        lb.append(start)
+        ub.append(start+span-1)
+    return Corners(tuple(lb), tuple(ub))
@@ -0,0 +1,95 @@
+import numpy as np
+
+class BoxIndex:
+    '''
+    A spatial index over n-dimensional boxes
+
+    Boxes are given by their inclusive lower and upper corners and stored in \
+        contiguous (n, ndim) arrays, so that containment and intersection \
+        queries are answered by a single vectorized comparison rather than a \
+        Python loop. Boxes of different dimensionality are kept apart, and a \
+        query only matches boxes of its own dimensionality.
+    '''
+    def __init__(self):
+        self._blocks = {}
+        self._where = {}
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def __contains__(self, key) -> bool:
+        return key in self._where
+
+    def __iter__(self):
+        return iter(list(self._where))
+
+    def insert(self, key, lb: tuple, ub: tuple):
+        '''
+        Add a box to the index, replacing any box already stored under key
+        '''
+        if key in self._where:
+            self.remove(key)
+        block = self._blocks.get(len(lb))
+        if block is None:
+            block = self._blocks[len(lb)] = {
+                'lb': np.empty((8, len(lb)), dtype=np.int64),
+                'ub': np.empty((8, len(lb)), dtype=np.int64),
+                'keys': []
+            }
+        n = len(block['keys'])
+        if n == len(block['lb']):
+            block['lb'] = np.concatenate([block['lb'], np.empty_like(block['lb'])])
+            block['ub'] = np.concatenate([block['ub'], np.empty_like(block['ub'])])
+        block['lb'][n] = lb
+        block['ub'][n] = ub
+        block['keys'].append(key)
+        self._where[key] = (len(lb), n)
+
+    def remove(self, key):
+        '''
+        Remove the box stored under key, if any
+        '''
+        if key not in self._where:
+            return
+        ndim, i = self._where.pop(key)
+        block = self._blocks[ndim]
+        last = len(block['keys']) - 1
+        if i != last:
+            block['lb'][i] = block['lb'][last]
+            block['ub'][i] = block['ub'][last]
+            moved = block['keys'][i] = block['keys'][last]
+            self._where[moved] = (ndim, i)
+        block['keys'].pop()
+
+    def _match(self, lb: tuple, ub: tuple, relation: str) -> list:
+        block = self._blocks.get(len(lb))
+        if block is None or not block['keys']:
+            return []
+        n = len(block['keys'])
+        lbs = block['lb'][:n]
+        ubs = block['ub'][:n]
+        if relation == 'containing':
+            mask = ((lbs <= lb) & (ubs >= ub)).all(axis=1)
+        elif relation == 'within':
+            mask = ((lbs >= lb) & (ubs <= ub)).all(axis=1)
+        else:
+            mask = ((lbs <= ub) & (ubs >= lb)).all(axis=1)
+        return [block['keys'][i] for i in np.flatnonzero(mask)]
+
+    def containing(self, lb: tuple, ub: tuple) -> list:
+        '''
+        Get the keys of every box that fully contains lb, ub
+        '''
+        return self._match(lb, ub, 'containing')
+
+    def within(self, lb: tuple, ub: tuple) -> list:
+        '''
+        Get the keys of every box that lies entirely inside lb, ub
+        '''
+        return self._match(lb, ub, 'within')
+
+    def intersecting(self, lb: tuple, ub: tuple) -> list:
+        '''
+        Get the keys of every box that overlaps lb, ub
+        '''
+        return self._match(lb, ub, 'intersecting')
@@ -0,0 +1,64 @@
+import numpy as np
+
+DECIMATE_METHODS = ('sample', 'mean')
+
+def parse_stride(value: str, ndim: int) -> tuple[int, ...]:
+    '''
+    Parse a comma-separated per-dimension stride
+
+    Parameters
+    ----------
+    value
+        Either a single stride, applied to every dimension, or one stride per \
+            dimension, e.g. "4" or "1,4,4"
+    ndim
+        The number of dimensions of the data
+
+    Returns
+    -------
+    A tuple of ndim positive strides
+
+    Raises
+    ------
+    ValueError
+        If the stride is malformed, not positive, or has the wrong length
+    '''
+    stride = tuple([int(x) for x in value.split(',')])
+    if len(stride) == 1:
+        stride = stride * ndim
+    if len(stride) != ndim:
+        raise ValueError(f'stride must have 1 or {ndim} values')
+    if any([s < 1 for s in stride]):
+        raise ValueError('stride must be positive')
+    return stride
+
+def decimate(data: np.ndarray, stride: tuple[int, ...], method: str = 'sample') -> np.ndarray:
+    '''
+    Reduce the resolution of an array
+
+    Parameters
+    ----------
+    data
+        The array to decimate
+    stride
+        The decimation factor in each dimension
+    method
+        'sample' keeps every stride-th element, starting at the first. \
+            'mean' averages each stride-sized block, dropping any partial \
+            block at the upper end of a dimension.
+
+    Returns
+    -------
+    A C-contiguous array. Mean decimation of integer data returns float64.
+    '''
+    if method == 'sample':
+        result = data[tuple([slice(None, None, s) for s in stride])]
+    elif method == 'mean':
+        dims = [n // s for n,s in zip(data.shape, stride)]
+        trimmed = data[tuple([slice(0, n * s) for n,s in zip(dims, stride)])]
+        blocks = trimmed.reshape([x for n,s in zip(dims, stride) for x in (n, s)])
+        dtype = data.dtype if np.issubdtype(data.dtype, np.inexact) else np.float64
+        result = blocks.mean(axis=tuple(range(1, 2 * data.ndim, 2)), dtype=dtype)
+    else:
+        raise ValueError(f"unknown decimation method '{method}'")
+    return np.ascontiguousarray(result)
@@ -1,12 +1,275 @@
-from dspaces import DSClient
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from dspaces import DSClient, DSConnectionError
 from api.config import dspaces_settings
+from api.helpers.metrics import observe_client_call
+
+class DSPoolTimeout(DSConnectionError):
+    '''
+    Raised when no DSClient could be checked out of the pool in time
+    '''
+
+class DSClientPool:
+    '''
+    A fixed-size pool of DSClient connections
+
+    Clients are created lazily, up to size. A client that raises \
+        DSConnectionError is discarded, and its slot is refilled with a new \
+        connection on the next checkout. Clients that have been idle for \
+        longer than probe_interval are health checked before being handed out.
+
+    Parameters
+    ----------
+    factory
+        Creates a new client; called whenever the pool needs a connection
+    size
+        The maximum number of clients
+    timeout
+        How long, in seconds, to wait for a free client before giving up
+    probe_interval
+        How long, in seconds, a client may sit idle before it is probed again
+    retries
+        How many times call() retries an operation on a fresh client after a \
+            DSConnectionError
+    '''
+    def __init__(self, factory, size: int, timeout: float, probe_interval: float, retries: int):
+        self.factory = factory
+        self.size = size
+        self.timeout = timeout
+        self.probe_interval = probe_interval
+        self.retries = retries
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._open = 0
+        self._stats = {
+            'created': 0,
+            'discarded': 0,
+            'checkouts': 0,
+            'in_use': 0,
+            'waiting': 0,
+            'timeouts': 0,
+            'probes': 0,
+            'probe_failures': 0
+        }
+
+    def _count(self, key: str, n: int = 1):
+        with self._lock:
+            self._stats[key] += n
+
+    def _reserve(self) -> bool:
+        # count a connection as open before it is made, so that concurrent
+        # connects cannot take the pool past its size
+        with self._lock:
+            if self._open >= self.size:
+                return False
+            self._open += 1
+            return True
+
+    def _discard(self):
+        with self._lock:
+            self._open -= 1
+            self._stats['discarded'] += 1
+
+    def _connect(self) -> DSClient:
+        '''
+        Open a connection for a reserved slot, giving the reservation up if \
+            the connection fails
+        '''
+        try:
+            client = self.factory()
+        except OSError as e:
+            # e.g. the server's host name does not resolve (yet)
+            with self._lock:
+                self._open -= 1
+            raise DSConnectionError(f'cannot reach the DataSpaces server: {e}')
+        except BaseException:
+            with self._lock:
+                self._open -= 1
+            raise
+        self._count('created')
+        return client
+
+    def warm(self) -> bool:
+        '''
+        Open a new connection and add it to the idle clients
+
+        Returns
+        -------
+        True if a connection was added, or False if the pool already has \
+            as many connections open, idle or checked out, as its size
+
+        Raises
+        ------
+        DSConnectionError
+            If the connection could not be made
+        '''
+        if not self._reserve():
+            return False
+        client = self._connect()
+        self._idle.put((client, time.monotonic()))
+        return True
+
+    def _probe(self, client: DSClient) -> bool:
+        self._count('probes')
+        try:
+            client.GetVars()
+            return True
+        except DSConnectionError:
+            self._count('probe_failures')
+            self._discard()
+            return False
+
+    def _acquire(self, timeout: float | None) -> DSClient:
+        timeout = self.timeout if timeout is None else timeout
+        self._count('waiting')
+        acquired = self._slots.acquire(timeout=timeout)
+        self._count('waiting', -1)
+        if not acquired:
+            self._count('timeouts')
+            raise DSPoolTimeout(f'no DataSpaces client available after {timeout}s')
+        try:
+            client = None
+            while client is None:
+                try:
+                    client, last_used = self._idle.get_nowait()
+                except queue.Empty:
+                    if self._reserve():
+                        client = self._connect()
+                        break
+                    # every connection is open; one being warmed up is on
+                    # its way to the idle clients
+                    try:
+                        client, last_used = self._idle.get(timeout=timeout)
+                    except queue.Empty:
+                        self._count('timeouts')
+                        raise DSPoolTimeout(f'no DataSpaces client available after {timeout}s')
+                if time.monotonic() - last_used > self.probe_interval and not self._probe(client):
+                    client = None
+        except BaseException:
+            self._slots.release()
+            raise
+        self._count('checkouts')
+        self._count('in_use')
+        return client
+
+    def _release(self, client: DSClient, broken: bool = False):
+        self._count('in_use', -1)
+        if broken:
+            self._discard()
+        else:
+            self._idle.put((client, time.monotonic()))
+        self._slots.release()
+
+    @contextmanager
+    def checkout(self, timeout: float | None = None):
+        '''
+        Check a client out of the pool for the duration of a with block
+
+        Parameters
+        ----------
+        timeout
+            How long to wait for a free client, overriding the pool default
+
+        Raises
+        ------
+        DSPoolTimeout
+            If no client became free in time
+        '''
+        client = self._acquire(timeout)
+        try:
+            yield client
+        except DSConnectionError:
+            self._release(client, broken=True)
+            raise
+        except BaseException:
+            self._release(client)
+            raise
+        else:
+            self._release(client)
+
+    def call(self, op: str, *args):
+        '''
+        Perform a DSClient operation on a pooled client
+
+        Parameters
+        ----------
+        op
+            The name of the DSClient method to call, e.g. Get or Put
+        args
+            The arguments to pass to the method
+
+        Returns
+        -------
+        The method's return value. If the method raises DSConnectionError, the \
+            client is rebuilt and the call is retried up to retries times \
+            before the error is propagated. Each attempt is recorded in the \
+            client call metrics.
+        '''
+        for attempt in range(self.retries + 1):
+            start = time.perf_counter()
+            try:
+                with self.checkout() as client:
+                    result = getattr(client, op)(*args)
+            except DSPoolTimeout as e:
+                observe_client_call(op, time.perf_counter() - start, e)
+                raise
+            except DSConnectionError as e:
+                observe_client_call(op, time.perf_counter() - start, e)
+                if attempt == self.retries:
+                    raise
+            except Exception as e:
+                observe_client_call(op, time.perf_counter() - start, e)
+                raise
+            else:
+                observe_client_call(op, time.perf_counter() - start)
+                return result
+
+    def stats(self) -> dict:
+        '''
+        Report the state of the pool
+
+        Returns
+        -------
+        A dict with the pool size, the number of open and idle clients, and \
+            counters for clients created and discarded, checkouts, waiters, \
+            timeouts and health probes
+        '''
+        with self._lock:
+            stats = dict(self._stats)
+            stats['open'] = self._open
+        stats['size'] = self.size
+        stats['idle'] = self._idle.qsize()
+        return stats
+
+def get_pool() -> DSClientPool:
+    '''
+    Get the client pool for the configured backend
 
-def get_client():
-    if get_client.client is None:
-        get_client.client = DSClient(conn = dspaces_settings.dspaces_connector)
-    return get_client.client
-get_client.client = None
+    With the embedded backend, the pool hands out clients of the \
+        in-process store instead of connections to a DataSpaces server.
+    '''
+    with get_pool.lock:
+        if get_pool.pool is None:
+            if dspaces_settings.dspaces_backend == 'embedded':
+                from api.helpers.embedded_client import EmbeddedDSClient, get_store
+                factory = lambda: EmbeddedDSClient(get_store())
+            else:
+                factory = lambda: DSClient(conn = dspaces_settings.dspaces_connector)
+            get_pool.pool = DSClientPool(
+                factory = factory,
+                size = dspaces_settings.dspaces_pool_size,
+                timeout = dspaces_settings.dspaces_pool_timeout,
+                probe_interval = dspaces_settings.dspaces_pool_probe_interval,
+                retries = dspaces_settings.dspaces_pool_retries
+            )
+    return get_pool.pool
+get_pool.pool = None
+get_pool.lock = threading.Lock()
 
 def nspace_name(namespace, name):
     name = namespace + '\\' + name if namespace else name
-    return name
\ No newline at end of file
+    return name
@@ -0,0 +1,181 @@
+import itertools
+import threading
+import tomllib
+
+import numpy as np
+
+from dspaces import DSModuleError, DSObject
+from api.config import dspaces_settings
+from api.helpers.box_index import BoxIndex
+
+def load_max_versions(path: str) -> int:
+    '''
+    Read the number of versions kept per variable from a DataSpaces \
+        server configuration file
+
+    Parameters
+    ----------
+    path
+        The path of the server's TOML configuration, e.g. dspaces.toml
+
+    Returns
+    -------
+    The server's max_versions, or 1 (the server default) if the file or \
+        the setting is missing
+    '''
+    try:
+        with open(path, 'rb') as f:
+            config = tomllib.load(f)
+    except FileNotFoundError:
+        return 1
+    return int(config.get('server', {}).get('max_versions', 1))
+
+class EmbeddedStore:
+    '''
+    In-process storage of versioned n-dimensional objects
+
+    Every put is kept as a separate block, indexed by its box. A read \
+        assembles the requested box from the blocks of the same name and \
+        version that overlap it, later puts taking precedence where blocks \
+        overlap; a block that a later put covers entirely is dropped. A read \
+        that lies inside a single block that no later block overlaps is \
+        answered with a read-only view of that block, without copying.
+
+    As on a DataSpaces server, only the max_versions most recent versions \
+        of each variable are kept; storing a newer version drops the oldest.
+
+    Parameters
+    ----------
+    max_versions
+        The number of versions kept per variable
+    '''
+    def __init__(self, max_versions: int):
+        self.max_versions = max_versions
+        self._vars = {}
+        self._blocks = {}
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def put(self, data: np.ndarray, name: str, version: int, offset: tuple):
+        lb = tuple(offset)
+        ub = tuple([o + s - 1 for o, s in zip(offset, data.shape)])
+        data = data.view()
+        data.flags.writeable = False
+        with self._lock:
+            versions = self._vars.setdefault(name, {})
+            index = versions.get(version)
+            if index is None:
+                index = versions[version] = BoxIndex()
+                while len(versions) > self.max_versions:
+                    self._drop(name, min(versions))
+                if version not in versions:
+                    # older than every version kept
+                    return
+            for key in index.within(lb, ub):
+                index.remove(key)
+                del self._blocks[key]
+            key = (name, version, next(self._seq))
+            index.insert(key, lb, ub)
+            self._blocks[key] = (lb, ub, data)
+
+    def _find(self, name: str, version: int, lb: tuple, ub: tuple) -> list:
+        index = self._vars.get(name, {}).get(version)
+        if index is None:
+            return []
+        return [self._blocks[key] for key in sorted(index.intersecting(lb, ub), key=lambda k: k[2])]
+
+    def _drop(self, name: str, version: int):
+        for key in self._vars[name].pop(version):
+            del self._blocks[key]
+
+    def get(self, name: str, version: int, lb: tuple, ub: tuple) -> np.ndarray | None:
+        with self._lock:
+            blocks = self._find(name, version, lb, ub)
+        if not blocks:
+            return None
+        blb, bub, data = blocks[-1]
+        if all(a <= b for a, b in zip(blb, lb)) and all(a >= b for a, b in zip(bub, ub)):
+            return data[tuple([slice(a-c, b-c+1) for a,b,c in zip(lb, ub, blb)])]
+        result = np.zeros([b-a+1 for a,b in zip(lb, ub)], dtype=data.dtype)
+        for blb, bub, data in blocks:
+            ilb = [max(a, b) for a,b in zip(blb, lb)]
+            iub = [min(a, b) for a,b in zip(bub, ub)]
+            result[tuple([slice(a-c, b-c+1) for a,b,c in zip(ilb, iub, lb)])] = \
+                data[tuple([slice(a-c, b-c+1) for a,b,c in zip(ilb, iub, blb)])]
+        return result
+
+    def names(self) -> list[str]:
+        with self._lock:
+            return list(self._vars)
+
+    def objects(self, name: str) -> list[DSObject]:
+        with self._lock:
+            versions = self._vars.get(name, {})
+            return [
+                DSObject(name=name, version=version, lb=lb, ub=ub)
+                for version in sorted(versions)
+                for lb, ub, _ in [self._blocks[key] for key in sorted(versions[version], key=lambda k: k[2])]
+            ]
+
+    def stats(self) -> dict:
+        '''
+        Report store usage
+
+        Returns
+        -------
+        A dict with the number of variables, versions and blocks held, \
+            their total size in bytes, and max_versions
+        '''
+        with self._lock:
+            return {
+                'variables': len(self._vars),
+                'versions': sum([len(v) for v in self._vars.values()]),
+                'blocks': len(self._blocks),
+                'bytes': sum([data.nbytes for _, _, data in self._blocks.values()]),
+                'max_versions': self.max_versions
+            }
+
+class EmbeddedDSClient:
+    '''
+    A DSClient stand-in that stages objects in process memory
+
+    It implements the DSClient operations used by the services on a \
+        shared EmbeddedStore, so that single-node deployments need no \
+        DataSpaces server. Remote execution runs fn in process on the \
+        assembled data. Registration relies on server modules and is not \
+        supported.
+    '''
+    def __init__(self, store: EmbeddedStore):
+        self.store = store
+
+    def Put(self, data: np.ndarray, name: str, version: int, offset: tuple):
+        self.store.put(data, name, version, offset)
+
+    def Get(self, name: str, version: int, lb: tuple, ub: tuple, timeout: int) -> np.ndarray | None:
+        # reads that wait for a put do so on the event loop (see read_obj)
+        return self.store.get(name, version, tuple(lb), tuple(ub))
+
+    def GetVars(self) -> list[str]:
+        return self.store.names()
+
+    def GetVarObjs(self, name: str) -> list[DSObject]:
+        return self.store.objects(name)
+
+    def Exec(self, name: str, version: int, lb: tuple, ub: tuple, fn):
+        return fn(self.Get(name, version, lb, ub, 0))
+
+    def VecExec(self, requests: list[DSObject], fn):
+        return fn(*[self.Get(r.name, r.version, r.lb, r.ub, 0) for r in requests])
+
+    def Register(self, type: str, name: str, data: dict):
+        raise DSModuleError('registration is not supported by the embedded backend')
+
+def get_store() -> EmbeddedStore:
+    with get_store.lock:
+        if get_store.store is None:
+            get_store.store = EmbeddedStore(
+                max_versions = load_max_versions(dspaces_settings.dspaces_config_file)
+            )
+    return get_store.store
+get_store.store = None
+get_store.lock = threading.Lock()
@@ -0,0 +1,290 @@
+import asyncio
+import threading
+import time
+import zlib
+
+from fastapi import HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+from api.config import dspaces_settings
+from api.helpers.etags import format_etag
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
+class _GzipCodec:
+    def compressor(self):
+        return zlib.compressobj(dspaces_settings.dspaces_gzip_level, zlib.DEFLATED, 31)
+
+    def decompressor(self):
+        return zlib.decompressobj(31)
+
+class _ZstdCodec:
+    def compressor(self):
+        return zstandard.ZstdCompressor(level=dspaces_settings.dspaces_zstd_level).compressobj()
+
+    def decompressor(self):
+        return zstandard.ZstdDecompressor().decompressobj()
+
+class _Lz4Compressor:
+    def __init__(self):
+        self._compressor = lz4.frame.LZ4FrameCompressor()
+        self._started = False
+
+    def compress(self, data) -> bytes:
+        out = b'' if self._started else self._compressor.begin()
+        self._started = True
+        return out + self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        out = b'' if self._started else self._compressor.begin()
+        return out + self._compressor.flush()
+
+class _Lz4Codec:
+    def compressor(self):
+        return _Lz4Compressor()
+
+    def decompressor(self):
+        return lz4.frame.LZ4FrameDecompressor()
+
+# in order of preference when a client accepts several equally
+CODECS = {}
+if zstandard is not None:
+    CODECS['zstd'] = _ZstdCodec()
+if lz4 is not None:
+    CODECS['lz4'] = _Lz4Codec()
+CODECS['gzip'] = _GzipCodec()
+
+class EncodingStats:
+    '''
+    Counters for the bytes and CPU time spent on content encoding
+
+    For each direction ('encode' for responses, 'decode' for requests) and \
+        codec, this tracks the number of bodies, the identity and encoded \
+        byte counts, and the thread CPU time spent in the codec.
+    '''
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, direction: str, codec: str, raw: int, encoded: int, cpu: float, bodies: int = 0):
+        with self._lock:
+            stats = self._stats.setdefault((direction, codec), {
+                'bodies': 0,
+                'raw_bytes': 0,
+                'encoded_bytes': 0,
+                'cpu_seconds': 0.0
+            })
+            stats['bodies'] += bodies
+            stats['raw_bytes'] += raw
+            stats['encoded_bytes'] += encoded
+            stats['cpu_seconds'] += cpu
+
+    def stats(self) -> dict:
+        '''
+        Report encoding activity
+
+        Returns
+        -------
+        A dict of direction to codec to counters, including the overall \
+            compression ratio (identity bytes per encoded byte)
+        '''
+        result = {}
+        with self._lock:
+            for (direction, codec), stats in self._stats.items():
+                stats = dict(stats)
+                stats['ratio'] = stats['raw_bytes'] / stats['encoded_bytes'] if stats['encoded_bytes'] else None
+                result.setdefault(direction, {})[codec] = stats
+        return result
+
+def get_encoding_stats() -> EncodingStats:
+    return get_encoding_stats.stats
+get_encoding_stats.stats = EncodingStats()
+
+def negotiate_encoding(accept_encoding: str | None, size: int | None) -> str | None:
+    '''
+    Choose a content encoding for a response
+
+    Parameters
+    ----------
+    accept_encoding
+        The request's Accept-Encoding header
+    size
+        The size of the identity response body in bytes, or None if unknown
+
+    Returns
+    -------
+    The name of a supported codec acceptable to the client, or None to send \
+        the body unencoded. Bodies known to be smaller than the configured \
+        threshold are never encoded.
+    '''
+    if not accept_encoding or (size is not None and size < dspaces_settings.dspaces_compress_min_bytes):
+        return None
+    weights = {}
+    for item in accept_encoding.split(','):
+        coding, _, params = item.strip().partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                continue
+        weights[coding.strip().lower()] = q
+    best, best_q = None, 0.0
+    for codec in CODECS:
+        q = weights.get(codec, weights.get('*', 0.0))
+        if q > best_q:
+            best, best_q = codec, q
+    return best
+
+def _encode(compressor, chunk) -> tuple[bytes, float]:
+    start = time.thread_time()
+    out = compressor.compress(chunk) if chunk is not None else compressor.flush()
+    return out, time.thread_time() - start
+
+async def iter_encoded(chunks, codec: str):
+    '''
+    Compress a stream of chunks
+
+    Compression runs in worker threads, one chunk at a time, so only one \
+        chunk of input and its output are held at once.
+
+    Parameters
+    ----------
+    chunks
+        An async iterator of bytes-like chunks
+    codec
+        The name of the codec, as returned by negotiate_encoding
+
+    Yields
+    ------
+    The compressed stream, in chunks
+    '''
+    compressor = CODECS[codec].compressor()
+    raw = encoded = 0
+    cpu = 0.0
+    try:
+        async for chunk in chunks:
+            raw += len(chunk)
+            out, t = await asyncio.to_thread(_encode, compressor, chunk)
+            cpu += t
+            if out:
+                encoded += len(out)
+                yield out
+        out, t = await asyncio.to_thread(_encode, compressor, None)
+        cpu += t
+        encoded += len(out)
+        yield out
+    finally:
+        get_encoding_stats().record('encode', codec, raw, encoded, cpu, bodies=1)
+
+def _decode(decompressor, chunk) -> tuple[bytes, float]:
+    start = time.thread_time()
+    out = decompressor.decompress(chunk)
+    return out, time.thread_time() - start
+
+async def iter_decoded(chunks, codec: str):
+    '''
+    Decompress a stream of chunks
+
+    Parameters
+    ----------
+    chunks
+        An async iterator of compressed bytes-like chunks, such as Request.stream()
+    codec
+        The name of the codec, from the request's Content-Encoding
+
+    Yields
+    ------
+    The decompressed stream, in chunks
+
+    Raises
+    ------
+    ValueError
+        If the codec is not supported, or the stream is corrupt
+    '''
+    if codec not in CODECS:
+        raise ValueError(f"unsupported content encoding '{codec}'")
+    decompressor = CODECS[codec].decompressor()
+    raw = encoded = 0
+    cpu = 0.0
+    try:
+        async for chunk in chunks:
+            if not chunk:
+                continue
+            encoded += len(chunk)
+            try:
+                out, t = await asyncio.to_thread(_decode, decompressor, chunk)
+            except Exception as e:
+                raise ValueError(f"corrupt {codec} body: {e}")
+            cpu += t
+            if out:
+                raw += len(out)
+                yield out
+    finally:
+        get_encoding_stats().record('decode', codec, raw, encoded, cpu, bodies=1)
+
+def get_request_encoding(request: Request) -> str | None:
+    '''
+    Get the codec for a request body from its Content-Encoding header
+
+    Returns
+    -------
+    The codec name, or None if the body is not encoded
+
+    Raises
+    ------
+    HTTPException
+        With status 415 if the encoding is not supported
+    '''
+    codec = request.headers.get('content-encoding', 'identity').strip().lower()
+    if codec == 'identity':
+        return None
+    if codec not in CODECS:
+        raise HTTPException(status_code=415, detail=f"unsupported content encoding '{codec}'")
+    return codec
+
+def encoded_response(chunks, size: int | None, headers: dict, media_type: str, accept_encoding: str | None, etag: str = None) -> StreamingResponse:
+    '''
+    Build a streaming response, compressed if the client accepts it
+
+    Parameters
+    ----------
+    chunks
+        An async iterator of the identity response body
+    size
+        The size of the identity body, or None if it isn't known up front
+    headers
+        Response headers
+    media_type
+        The response media type
+    accept_encoding
+        The request's Accept-Encoding header
+    etag
+        The unquoted entity tag of the identity body, if any. The ETag \
+            header of a compressed response is marked with its codec.
+
+    Returns
+    -------
+    A StreamingResponse with Content-Encoding set if the body is compressed, \
+        or Content-Length set if it isn't and its size is known
+    '''
+    codec = negotiate_encoding(accept_encoding, size)
+    headers = dict(headers)
+    headers['Vary'] = ', '.join([v for v in (headers.get('Vary'), 'Accept-Encoding') if v])
+    if etag is not None:
+        headers['ETag'] = format_etag(etag, codec)
+    if codec is not None:
+        headers['Content-Encoding'] = codec
+        chunks = iter_encoded(chunks, codec)
+    elif size is not None:
+        headers['Content-Length'] = str(size)
+    return StreamingResponse(chunks, headers=headers, media_type=media_type)
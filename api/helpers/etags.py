@@ -0,0 +1,167 @@
+import hashlib
+import secrets
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from api.config import dspaces_settings
+from api.helpers.streaming import get_array_view
+
+def compute_etag(identity: tuple, data: np.ndarray) -> str:
+    '''
+    Derive a strong entity tag for an object response
+
+    Parameters
+    ----------
+    identity
+        Everything that selects the representation: the object, its box, \
+            decimation and media type
+    data
+        The array being returned
+
+    Returns
+    -------
+    The unquoted tag, a hash of identity and the array's dtype, shape and \
+        bytes. Encoded responses append their codec to it.
+    '''
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr((identity, data.dtype.str, data.shape)).encode())
+    h.update(get_array_view(data))
+    return h.hexdigest()
+
+# write generations restart from zero with the process, so tags derived from
+# them are salted to keep a restarted server from reissuing an old tag
+_INSTANCE = secrets.token_hex(8)
+
+def compute_meta_etag(identity: tuple, dtype: np.dtype, shape: tuple, generation: int) -> str:
+    '''
+    Derive a strong entity tag for an object response from its metadata, \
+        for objects too large for the object cache, which are not hashed \
+        since that would mean reading them whole
+
+    Parameters
+    ----------
+    identity
+        Everything that selects the representation, as for compute_etag
+    dtype, shape
+        The dtype and shape of the array being returned
+    generation
+        The write generation of the object version (see \
+            ObjectCache.generation)
+
+    Returns
+    -------
+    The unquoted tag. It changes with puts through the API and with \
+        restarts of the API, but not with writes by other DataSpaces \
+        clients, which tags answered from the memo do not see either.
+    '''
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr((_INSTANCE, identity, np.dtype(dtype).str, tuple(shape), generation)).encode())
+    return h.hexdigest()
+
+def format_etag(etag: str, codec: str | None = None) -> str:
+    '''
+    Quote an entity tag for a header, marking the content encoding, if any, \
+        so that each encoding of a response has its own strong tag
+    '''
+    return f'"{etag}-{codec}"' if codec else f'"{etag}"'
+
+def etag_matches(header: str | None, etag: str) -> str | None:
+    '''
+    Check an If-None-Match header against a response's tag
+
+    Parameters
+    ----------
+    header
+        The If-None-Match header
+    etag
+        The unquoted tag of the response, as returned by compute_etag
+
+    Returns
+    -------
+    The matching tag, quoted, if the header is * or lists the tag of any \
+        encoding of the response, or None otherwise
+    '''
+    if not header:
+        return None
+    for tag in header.split(','):
+        tag = tag.strip()
+        if tag == '*':
+            return format_etag(etag)
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag.strip('"').split('-', 1)[0] == etag:
+            return tag
+    return None
+
+class EtagMemo:
+    '''
+    An LRU memo of the entity tags of recent object responses
+
+    Tags are keyed by response identity, and stored with the write \
+        generation of the object version they were computed at (see \
+        ObjectCache.generation), so that a put through the API invalidates \
+        them. A conditional request whose tag is in the memo is answered \
+        without a backend call.
+
+    Parameters
+    ----------
+    max_entries
+        The number of tags to keep. Zero disables the memo.
+    '''
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'not_modified': 0
+        }
+
+    def get(self, identity: tuple, generation: int) -> str | None:
+        with self._lock:
+            entry = self._entries.get(identity)
+            if entry is None or entry[0] != generation:
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(identity)
+            self._stats['hits'] += 1
+            return entry[1]
+
+    def put(self, identity: tuple, generation: int, etag: str):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[identity] = (generation, etag)
+            self._entries.move_to_end(identity)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def count_not_modified(self):
+        with self._lock:
+            self._stats['not_modified'] += 1
+
+    def stats(self) -> dict:
+        '''
+        Report memo usage
+
+        Returns
+        -------
+        A dict with the memo size and limit, counters for lookups that hit \
+            and missed, and the number of 304 responses sent
+        '''
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        stats['max_entries'] = self.max_entries
+        return stats
+
+def get_etag_memo() -> EtagMemo:
+    with get_etag_memo.lock:
+        if get_etag_memo.memo is None:
+            get_etag_memo.memo = EtagMemo(max_entries = dspaces_settings.dspaces_etag_memo_size)
+    return get_etag_memo.memo
+get_etag_memo.memo = None
+get_etag_memo.lock = threading.Lock()
@@ -0,0 +1,142 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+from api.config import dspaces_settings
+
+class ExecTimeout(Exception):
+    '''
+    Raised when a remote execution does not finish within its timeout
+    '''
+
+class ExecPool:
+    '''
+    A process pool for remote execution requests
+
+    Running user functions in separate processes keeps CPU-heavy functions \
+        from holding the GIL in the API process. A call that exceeds its \
+        timeout is cancelled if it has not started; if it has, the worker \
+        processes are terminated and the pool is replaced, since a running \
+        call cannot otherwise be stopped. Other calls running in the pool at \
+        that moment fail with BrokenProcessPool.
+
+    Parameters
+    ----------
+    processes
+        The number of worker processes
+    timeout
+        The default per-call timeout, in seconds
+    '''
+    def __init__(self, processes: int, timeout: float):
+        self.processes = processes
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._pool = self._new_pool()
+        self._stats = {
+            'calls': 0,
+            'running': 0,
+            'timeouts': 0,
+            'recycles': 0
+        }
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        # spawn, so that workers don't inherit the parent's client pool and threads
+        return ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context('spawn')
+        )
+
+    def _recycle(self, pool: ProcessPoolExecutor):
+        with self._lock:
+            if self._pool is not pool:
+                return
+            self._pool = self._new_pool()
+            self._stats['recycles'] += 1
+        for process in list((pool._processes or {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, fn, /, *args, timeout: float = None, **kwargs):
+        '''
+        Run fn(*args, **kwargs) in a worker process
+
+        Parameters
+        ----------
+        fn
+            A picklable callable
+        timeout
+            The timeout for this call, overriding the pool default
+
+        Returns
+        -------
+        The return value of fn. Exceptions raised by fn are propagated.
+
+        Raises
+        ------
+        ExecTimeout
+            If the call does not finish in time
+        '''
+        timeout = self.timeout if timeout is None else timeout
+        with self._lock:
+            pool = self._pool
+            self._stats['calls'] += 1
+            self._stats['running'] += 1
+        try:
+            future = pool.submit(partial(fn, *args, **kwargs))
+            try:
+                return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+            except asyncio.TimeoutError:
+                with self._lock:
+                    self._stats['timeouts'] += 1
+                if not future.cancel():
+                    self._recycle(pool)
+                raise ExecTimeout(f'execution did not finish within {timeout}s')
+            except asyncio.CancelledError:
+                if not future.cancel():
+                    self._recycle(pool)
+                raise
+            except BrokenProcessPool:
+                self._recycle(pool)
+                raise
+        finally:
+            with self._lock:
+                self._stats['running'] -= 1
+
+    def stats(self) -> dict:
+        '''
+        Report pool activity
+
+        Returns
+        -------
+        A dict with the number of processes, and counters for calls made, \
+            calls running, timeouts, and pool replacements
+        '''
+        with self._lock:
+            stats = dict(self._stats)
+        stats['processes'] = self.processes
+        return stats
+
+def get_exec_pool() -> ExecPool | None:
+    '''
+    Get the remote execution process pool
+
+    Returns
+    -------
+    The pool, or None if remote execution runs in threads \
+        (dspaces_exec_processes is 0, or the embedded backend is used, \
+        whose objects live in this process)
+    '''
+    if dspaces_settings.dspaces_exec_processes <= 0 or dspaces_settings.dspaces_backend == 'embedded':
+        return None
+    with get_exec_pool.lock:
+        if get_exec_pool.pool is None:
+            get_exec_pool.pool = ExecPool(
+                processes = dspaces_settings.dspaces_exec_processes,
+                timeout = dspaces_settings.dspaces_exec_timeout
+            )
+    return get_exec_pool.pool
+get_exec_pool.pool = None
+get_exec_pool.lock = threading.Lock()
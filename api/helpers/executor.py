@@ -0,0 +1,97 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from api.config import dspaces_settings
+
+class DSExecutor:
+    '''
+    A dedicated thread pool for blocking DSClient work
+
+    Each operation (named after the DSClient method it performs, e.g. Get or \
+        Put) has its own concurrency limit, so that a burst of one kind of \
+        request cannot occupy every worker thread. Requests beyond the limit \
+        wait on the event loop rather than in the pool's queue.
+
+    Parameters
+    ----------
+    max_workers
+        The number of worker threads in the pool
+    limits
+        The maximum number of concurrently running calls for each operation
+    '''
+    def __init__(self, max_workers: int, limits: dict[str, int]):
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='dspaces')
+        self.max_workers = max_workers
+        self.limits = dict(limits)
+        self._sems = {op: asyncio.Semaphore(n) for op, n in self.limits.items()}
+        self._waiting = dict.fromkeys(self.limits, 0)
+        self._active = dict.fromkeys(self.limits, 0)
+
+    async def run(self, op: str, fn, /, *args, **kwargs):
+        '''
+        Run a blocking call in the pool, subject to the limit for op
+
+        Parameters
+        ----------
+        op
+            The operation the call performs
+        fn
+            The blocking callable; args and kwargs are passed through to it
+
+        Returns
+        -------
+        The return value of fn. Exceptions raised by fn are propagated.
+        '''
+        sem = self._sems[op]
+        self._waiting[op] += 1
+        try:
+            await sem.acquire()
+        finally:
+            self._waiting[op] -= 1
+        loop = asyncio.get_running_loop()
+        def release(_):
+            # only free the slot once the worker thread is done with the call,
+            # even if the awaiting request has been cancelled
+            loop.call_soon_threadsafe(self._release, op)
+        self._active[op] += 1
+        try:
+            future = self.pool.submit(partial(fn, *args, **kwargs))
+        except BaseException:
+            self._release(op)
+            raise
+        future.add_done_callback(release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, op: str):
+        self._active[op] -= 1
+        self._sems[op].release()
+
+    def stats(self) -> dict:
+        '''
+        Report the current load of the executor
+
+        Returns
+        -------
+        A dict with the pool size and, for each operation, its limit, the number \
+            of calls running and the number of calls queued behind the limit
+        '''
+        return {
+            'max_workers': self.max_workers,
+            'operations': {
+                op: {
+                    'limit': self.limits[op],
+                    'active': self._active[op],
+                    'waiting': self._waiting[op]
+                } for op in self.limits
+            }
+        }
+
+def get_executor() -> DSExecutor:
+    if get_executor.executor is None:
+        get_executor.executor = DSExecutor(
+            max_workers=dspaces_settings.dspaces_executor_workers,
+            limits=dspaces_settings.dspaces_op_limits
+        )
+    return get_executor.executor
+get_executor.executor = None
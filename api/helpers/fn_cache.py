@@ -0,0 +1,82 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from api.config import dspaces_settings
+
+class FnCache:
+    '''
+    An LRU cache of deserialized functions
+
+    Functions submitted for remote execution are keyed by a hash of their \
+        dill serialization, so a function that is submitted repeatedly is \
+        only deserialized once.
+
+    Parameters
+    ----------
+    max_entries
+        The number of functions to keep. Zero disables the cache.
+    '''
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0
+        }
+
+    def load(self, fn: bytes):
+        '''
+        Deserialize a dilled function, or get it from the cache
+
+        Parameters
+        ----------
+        fn
+            The dill serialization of the function
+
+        Returns
+        -------
+        The function
+        '''
+        key = hashlib.sha256(fn).digest()
+        with self._lock:
+            func = self._entries.get(key)
+            if func is not None:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return func
+            self._stats['misses'] += 1
+        import dill
+        func = dill.loads(fn)
+        if self.max_entries > 0:
+            with self._lock:
+                self._entries[key] = func
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self._stats['evictions'] += 1
+        return func
+
+    def stats(self) -> dict:
+        '''
+        Report cache usage
+
+        Returns
+        -------
+        A dict with the cache size and limit, and counters for hits, misses \
+            and evictions
+        '''
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        stats['max_entries'] = self.max_entries
+        return stats
+
+def get_fn_cache() -> FnCache:
+    with get_fn_cache.lock:
+        if get_fn_cache.cache is None:
+            get_fn_cache.cache = FnCache(max_entries = dspaces_settings.dspaces_fn_cache_size)
+    return get_fn_cache.cache
+get_fn_cache.cache = None
+get_fn_cache.lock = threading.Lock()
@@ -0,0 +1,153 @@
+import importlib.util
+import io
+import json
+
+import numpy as np
+
+from api.helpers.streaming import get_array_view
+
+OCTET_STREAM = 'application/octet-stream'
+NPY = 'application/x-npy'
+ARROW_STREAM = 'application/vnd.apache.arrow.stream'
+
+# in order of preference when a client accepts several equally
+FORMATS = [OCTET_STREAM, NPY]
+# pyarrow is slow to import, so it is only imported once Arrow is requested
+if importlib.util.find_spec('pyarrow') is not None:
+    FORMATS.append(ARROW_STREAM)
+
+def negotiate_format(accept: str | None) -> str:
+    '''
+    Choose the serialization of an object response
+
+    Parameters
+    ----------
+    accept
+        The request's Accept header
+
+    Returns
+    -------
+    The supported media type the client prefers. Raw octet-stream is used \
+        when the client accepts anything, or nothing that is supported.
+    '''
+    if not accept:
+        return OCTET_STREAM
+    best, best_q = OCTET_STREAM, 0.0
+    for item in accept.split(','):
+        media_type, _, params = item.strip().partition(';')
+        media_type = media_type.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                continue
+        if media_type in FORMATS and (q > best_q or (q == best_q and FORMATS.index(media_type) < FORMATS.index(best))):
+            best, best_q = media_type, q
+    return best
+
+class _PartsSink:
+    '''
+    A write-only file that keeps the buffers written to it instead of copying them
+    '''
+    closed = False
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, data) -> int:
+        view = memoryview(data)
+        self.parts.append(view)
+        return view.nbytes
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+def _npy_parts(data: np.ndarray) -> list[memoryview]:
+    view = get_array_view(data)
+    header = io.BytesIO()
+    np.lib.format.write_array_header_2_0(header, {
+        'descr': np.lib.format.dtype_to_descr(data.dtype),
+        'fortran_order': False,
+        'shape': data.shape
+    })
+    return [header.getbuffer(), view]
+
+def _arrow_parts(data: np.ndarray, meta: dict) -> list[memoryview]:
+    import pyarrow
+    import pyarrow.ipc
+    view = get_array_view(data)
+    if data.dtype.kind in 'iuf':
+        values = pyarrow.Array.from_buffers(pyarrow.from_numpy_dtype(data.dtype), data.size, [None, pyarrow.py_buffer(view)])
+    else:
+        values = pyarrow.array(np.ascontiguousarray(data).ravel())
+    shape = list(data.shape) or [1]
+    tensor_type = pyarrow.fixed_shape_tensor(values.type, shape)
+    column = pyarrow.ExtensionArray.from_storage(
+        tensor_type,
+        pyarrow.FixedSizeListArray.from_arrays(values, max(data.size, 1))
+    )
+    batch = pyarrow.record_batch([column], names=['data'])
+    batch = batch.replace_schema_metadata({'dspaces': json.dumps(meta)})
+    sink = _PartsSink()
+    with pyarrow.ipc.new_stream(pyarrow.PythonFile(sink, mode='w'), batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.parts
+
+def serialize_obj(data: np.ndarray, media_type: str, meta: dict) -> list[memoryview]:
+    '''
+    Serialize an object response without copying its data
+
+    Parameters
+    ----------
+    data
+        The array being returned
+    media_type
+        One of FORMATS
+    meta
+        The object description, as returned by get_obj_meta. It is embedded \
+            in the schema metadata of Arrow responses.
+
+    Returns
+    -------
+    The response body as a list of buffers. The array's data is referenced, \
+        not copied, unless it is not C-contiguous, or is of a type that \
+        Arrow stores differently from NumPy.
+    '''
+    if media_type == NPY:
+        return _npy_parts(data)
+    if media_type == ARROW_STREAM:
+        return _arrow_parts(data, meta)
+    return [get_array_view(data)]
+
+async def iter_parts(parts: list[memoryview], chunk_size: int, start: int = 0, end: int = None):
+    '''
+    Iterate over a range of a serialized body in bounded chunks without copying
+
+    Parameters
+    ----------
+    parts
+        The body, as returned by serialize_obj
+    chunk_size
+        The maximum number of bytes per chunk
+    start
+        The first byte to send
+    end
+        One past the last byte to send, or None for the end of the body
+
+    Yields
+    ------
+    memoryview slices of the parts
+    '''
+    offset = 0
+    for part in parts:
+        part = part.cast('B') if part.format != 'B' or part.ndim != 1 else part
+        lo = max(start - offset, 0)
+        hi = part.nbytes if end is None else min(end - offset, part.nbytes)
+        offset += part.nbytes
+        for i in range(lo, hi, chunk_size):
+            yield part[i:min(i+chunk_size, hi)]
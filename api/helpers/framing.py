@@ -0,0 +1,164 @@
+import json
+import struct
+
+import numpy as np
+
+from api.helpers.streaming import iter_array_chunks, get_array_view
+
+FRAMES_MEDIA_TYPE = 'application/x-dspaces-frames'
+
+_LENGTH = struct.Struct('>I')
+
+async def iter_frame(meta: dict, data: np.ndarray | None, chunk_size: int):
+    '''
+    Serialize one frame of a framed binary stream
+
+    A frame is a 4-byte big-endian header length, a UTF-8 JSON header, and \
+        then the payload. The header's length field gives the size of the \
+        payload in bytes, and is filled in from data.
+
+    Parameters
+    ----------
+    meta
+        The frame header fields
+    data
+        The payload array, or None for a frame without a payload
+    chunk_size
+        The maximum number of bytes per payload chunk
+
+    Yields
+    ------
+    The frame header, then memoryview slices of the payload
+    '''
+    meta = dict(meta, length=0 if data is None else data.nbytes)
+    header = json.dumps(meta).encode()
+    yield _LENGTH.pack(len(header)) + header
+    if data is not None:
+        async for chunk in iter_array_chunks(data, chunk_size):
+            yield chunk
+
+def encode_frame(meta: dict, data: np.ndarray | None) -> bytearray:
+    '''
+    Serialize one frame of a framed binary stream into a single buffer, \
+        for transports that send each frame as one message
+
+    Parameters
+    ----------
+    meta
+        The frame header fields
+    data
+        The payload array, or None for a frame without a payload
+
+    Returns
+    -------
+    The frame, laid out as by iter_frame
+    '''
+    meta = dict(meta, length=0 if data is None else data.nbytes)
+    header = json.dumps(meta).encode()
+    offset = _LENGTH.size + len(header)
+    frame = bytearray(offset + meta['length'])
+    _LENGTH.pack_into(frame, 0, len(header))
+    frame[_LENGTH.size:offset] = header
+    if data is not None:
+        frame[offset:] = get_array_view(data)
+    return frame
+
+class FrameReader:
+    '''
+    Parse a framed binary stream, as produced by iter_frame, incrementally
+
+    Parameters
+    ----------
+    stream
+        An async iterator of bytes-like chunks, such as Request.stream()
+    max_header_size
+        The largest frame header, in bytes, that will be accepted
+    '''
+    def __init__(self, stream, max_header_size: int = 1 << 16):
+        self._stream = stream.__aiter__()
+        self._pending = memoryview(b'')
+        self.max_header_size = max_header_size
+
+    async def _read(self, n: int) -> memoryview | None:
+        while not self._pending:
+            try:
+                self._pending = memoryview(await self._stream.__anext__())
+            except StopAsyncIteration:
+                return None
+        chunk, self._pending = self._pending[:n], self._pending[n:]
+        return chunk
+
+    async def readinto(self, view: memoryview) -> int:
+        '''
+        Fill view from the stream, stopping early only at the end of the stream
+
+        Returns
+        -------
+        The number of bytes read
+        '''
+        offset = 0
+        while offset < view.nbytes:
+            chunk = await self._read(view.nbytes - offset)
+            if chunk is None:
+                break
+            view[offset:offset+len(chunk)] = chunk
+            offset += len(chunk)
+        return offset
+
+    async def read_header(self) -> dict | None:
+        '''
+        Read the next frame header
+
+        Returns
+        -------
+        The decoded header, or None at the end of the stream
+
+        Raises
+        ------
+        ValueError
+            If the stream ends inside a header, or the header is too large or \
+                is not a JSON object
+        '''
+        prefix = bytearray(_LENGTH.size)
+        n = await self.readinto(memoryview(prefix))
+        if n == 0:
+            return None
+        if n < _LENGTH.size:
+            raise ValueError("truncated frame header")
+        (size,) = _LENGTH.unpack(prefix)
+        if size > self.max_header_size:
+            raise ValueError("frame header too large")
+        header = bytearray(size)
+        if await self.readinto(memoryview(header)) < size:
+            raise ValueError("truncated frame header")
+        meta = json.loads(header)
+        if not isinstance(meta, dict):
+            raise ValueError("frame header must be a JSON object")
+        return meta
+
+    async def read_payload(self, view: memoryview):
+        '''
+        Read a frame payload into view, which must be exactly its length
+
+        Raises
+        ------
+        ValueError
+            If the stream ends inside the payload
+        '''
+        if await self.readinto(view) < view.nbytes:
+            raise ValueError("truncated frame payload")
+
+    async def skip_payload(self, length: int):
+        '''
+        Discard a frame payload of length bytes
+
+        Raises
+        ------
+        ValueError
+            If the stream ends inside the payload
+        '''
+        while length:
+            chunk = await self._read(length)
+            if chunk is None:
+                raise ValueError("truncated frame payload")
+            length -= len(chunk)
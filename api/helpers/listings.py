@@ -0,0 +1,239 @@
+import asyncio
+import base64
+import bisect
+import json
+import time
+
+from api.config import dspaces_settings
+from api.helpers.executor import get_executor
+from api.services.dspaces_services import get_dspaces_vars
+
+class ListingError(Exception):
+    '''
+    A listing could not be loaded from the backend
+    '''
+
+class Snapshot:
+    '''
+    A sorted copy of a backend listing
+
+    Parameters
+    ----------
+    load
+        A blocking callable that returns the sorted items, or None if the \
+            backend query failed
+    op
+        The executor operation load performs
+    '''
+    def __init__(self, load, op: str):
+        self.load = load
+        self.op = op
+        self.items = None
+        self.members = None
+        self.loaded_at = None
+        self.generation = 0
+        self.valid_generation = -1
+        self.lock = asyncio.Lock()
+        self.refreshing = None
+
+    def invalidate(self):
+        self.generation += 1
+
+    async def reload(self):
+        generation = self.generation
+        items = await get_executor().run(self.op, self.load)
+        if items is None:
+            raise ListingError(f"{self.op} returned no listing")
+        self.items = items
+        self.members = set(items)
+        self.loaded_at = time.monotonic()
+        self.valid_generation = generation
+
+class ListingCache:
+    '''
+    A snapshot of the variable list
+
+    The snapshot is loaded on first use and served from memory afterwards. \
+        Once it is older than ttl, it is still served while a reload runs \
+        in the background, to pick up changes made by other DataSpaces \
+        clients. A put of a new variable through the API invalidates it, \
+        and it is then reloaded before it is next served. Object lists are \
+        served from the variables' spatial indexes instead (see \
+        IndexCatalog).
+
+    Parameters
+    ----------
+    ttl
+        Seconds after which a snapshot is reloaded in the background
+    '''
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._vars = Snapshot(get_dspaces_vars, 'GetVars')
+        self._stats = {
+            'hits': 0,
+            'loads': 0,
+            'background_loads': 0,
+            'load_errors': 0,
+            'invalidations': 0
+        }
+
+    async def _get(self, snapshot: Snapshot) -> list:
+        async with snapshot.lock:
+            if snapshot.items is None or snapshot.valid_generation != snapshot.generation:
+                self._stats['loads'] += 1
+                try:
+                    await snapshot.reload()
+                except ListingError:
+                    self._stats['load_errors'] += 1
+                    raise
+                except Exception as e:
+                    self._stats['load_errors'] += 1
+                    raise ListingError(str(e)) from e
+                return snapshot.items
+        self._stats['hits'] += 1
+        if time.monotonic() - snapshot.loaded_at > self.ttl and snapshot.refreshing is None:
+            snapshot.refreshing = asyncio.create_task(self._refresh(snapshot))
+        return snapshot.items
+
+    async def _refresh(self, snapshot: Snapshot):
+        self._stats['background_loads'] += 1
+        try:
+            async with snapshot.lock:
+                await snapshot.reload()
+        except Exception:
+            self._stats['load_errors'] += 1
+        finally:
+            snapshot.refreshing = None
+
+    async def vars(self) -> list[str]:
+        '''
+        Get the sorted names of the stored variables
+
+        Raises
+        ------
+        ListingError
+            If the snapshot had to be loaded and the backend query failed. \
+                Failed background reloads keep the previous snapshot.
+        '''
+        return await self._get(self._vars)
+
+    def invalidate(self, name: str):
+        '''
+        Invalidate the snapshot if a put through the API added a variable
+        '''
+        if self._vars.members is not None and name not in self._vars.members:
+            self._vars.invalidate()
+            self._stats['invalidations'] += 1
+
+    def stats(self) -> dict:
+        '''
+        Report snapshot usage
+
+        Returns
+        -------
+        A dict with counters for listings served from the snapshot, loads, \
+            background loads and their errors, and invalidations by puts
+        '''
+        return dict(self._stats)
+
+def encode_cursor(key) -> str:
+    '''
+    Encode the last listed item as an opaque pagination cursor
+    '''
+    return base64.urlsafe_b64encode(json.dumps(key, separators=(',', ':')).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor: str):
+    '''
+    Decode a pagination cursor
+
+    Returns
+    -------
+    The last listed item, with lists turned back into tuples
+
+    Raises
+    ------
+    ValueError
+        If the cursor is malformed
+    '''
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except Exception:
+        raise ValueError("malformed cursor")
+    def freeze(value):
+        return tuple([freeze(v) for v in value]) if isinstance(value, list) else value
+    return freeze(key)
+
+def page_vars(names: list[str], prefix: str, cursor: str = None, limit: int = None) -> tuple[list[str], str | None]:
+    '''
+    Select a page of a sorted variable list
+
+    Parameters
+    ----------
+    names
+        The sorted variable names
+    prefix
+        Only names starting with this are listed
+    cursor
+        The cursor returned with the previous page, if any
+    limit
+        The most names to list, or None for all of them
+
+    Returns
+    -------
+    The page, and the cursor of the next page or None if this is the last
+
+    Raises
+    ------
+    ValueError
+        If the cursor is malformed
+    '''
+    start = bisect.bisect_left(names, prefix)
+    if cursor is not None:
+        last = decode_cursor(cursor)
+        if not isinstance(last, str):
+            raise ValueError("malformed cursor")
+        start = max(start, bisect.bisect_right(names, last))
+    page = []
+    for i in range(start, len(names)):
+        name = names[i]
+        if not name.startswith(prefix):
+            break
+        if limit is not None and len(page) == limit:
+            return page, encode_cursor(page[-1])
+        page.append(name)
+    return page, None
+
+def page_objects(objs: list[tuple], min_version: int, max_version: int | None, cursor: str = None,
+                 limit: int = None) -> tuple[list[tuple], str | None]:
+    '''
+    Select a page of a sorted object list, as for page_vars
+
+    Parameters
+    ----------
+    min_version, max_version
+        The inclusive range of versions to list
+    '''
+    start = bisect.bisect_left(objs, (min_version,))
+    if cursor is not None:
+        last = decode_cursor(cursor)
+        if not (isinstance(last, tuple) and len(last) == 3):
+            raise ValueError("malformed cursor")
+        try:
+            start = max(start, bisect.bisect_right(objs, last))
+        except TypeError:
+            raise ValueError("malformed cursor")
+    page = []
+    for i in range(start, len(objs)):
+        obj = objs[i]
+        if max_version is not None and obj[0] > max_version:
+            break
+        if limit is not None and len(page) == limit:
+            return page, encode_cursor(page[-1])
+        page.append(obj)
+    return page, None
+
+def get_listings() -> ListingCache:
+    if get_listings.cache is None:
+        get_listings.cache = ListingCache(ttl = dspaces_settings.dspaces_listing_ttl)
+    return get_listings.cache
+get_listings.cache = None
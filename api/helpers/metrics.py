@@ -0,0 +1,167 @@
+import time
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from starlette.routing import get_route_path
+
+METRICS_MEDIA_TYPE = CONTENT_TYPE_LATEST
+
+# finer than the prometheus defaults at the low end, where cached reads and
+# small backend calls land
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+REQUEST_LATENCY = Histogram(
+    'dspaces_http_request_duration_seconds',
+    'Time from receiving a request to sending the last byte of its response',
+    ['method', 'route'],
+    buckets=LATENCY_BUCKETS
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    'dspaces_http_requests_in_flight',
+    'Requests currently being handled',
+    ['method']
+)
+REQUEST_BYTES = Counter(
+    'dspaces_http_request_bytes',
+    'Request body bytes received',
+    ['method', 'route']
+)
+RESPONSE_BYTES = Counter(
+    'dspaces_http_response_bytes',
+    'Response body bytes sent',
+    ['method', 'route']
+)
+CLIENT_LATENCY = Histogram(
+    'dspaces_client_call_duration_seconds',
+    'Time spent in DSClient calls, including waiting for a pooled client',
+    ['op'],
+    buckets=LATENCY_BUCKETS
+)
+CLIENT_ERRORS = Counter(
+    'dspaces_client_errors',
+    'DSClient calls that raised, by exception type',
+    ['op', 'exception']
+)
+
+class _Children:
+    '''
+    A memo of labelled metric children
+
+    Looking up a child with labels() takes a lock and builds a key on every \
+        call; the children are fixed once created, so they are cached here \
+        and looked up with a plain dict access.
+    '''
+    def __init__(self, metric):
+        self._metric = metric
+        self._children = {}
+
+    def __call__(self, *labels):
+        child = self._children.get(labels)
+        if child is None:
+            child = self._children[labels] = self._metric.labels(*labels)
+        return child
+
+_request_latency = _Children(REQUEST_LATENCY)
+_requests_in_flight = _Children(REQUESTS_IN_FLIGHT)
+_request_bytes = _Children(REQUEST_BYTES)
+_response_bytes = _Children(RESPONSE_BYTES)
+_client_latency = _Children(CLIENT_LATENCY)
+_client_errors = _Children(CLIENT_ERRORS)
+
+def observe_client_call(op: str, seconds: float, error: BaseException = None):
+    '''
+    Record a DSClient call
+
+    Parameters
+    ----------
+    op
+        The DSClient method called
+    seconds
+        How long the call took
+    error
+        The exception the call raised, if any
+    '''
+    _client_latency(op).observe(seconds)
+    if error is not None:
+        _client_errors(op, type(error).__name__).inc()
+
+def get_metrics() -> bytes:
+    '''
+    Render every metric in the Prometheus text exposition format
+    '''
+    return generate_latest()
+
+def get_route_label(scope) -> str:
+    '''
+    Get the route template a request matched, as mounted: with the root \
+        path and the prefix of the router the route was included with
+
+    Returns
+    -------
+    The template, e.g. /dspaces/obj/{obj_name}/{obj_version}, or \
+        'unmatched' if the request matched no route
+    '''
+    route = scope.get('route')
+    path = getattr(route, 'path', None)
+    if path is None:
+        return 'unmatched'
+    route_path = get_route_path(scope)
+    # depending on the FastAPI version, an included route's path may lack
+    # its router's prefix, which is then the part of the request path that
+    # comes before what the route's own pattern matches
+    prefix = ''
+    for i, c in enumerate(route_path):
+        if c == '/' and route.path_regex.match(route_path[i:]):
+            prefix = route_path[:i]
+            break
+    return scope.get('root_path', '') + prefix + path
+
+class MetricsMiddleware:
+    '''
+    ASGI middleware that records latency, in-flight requests and body bytes \
+        for each HTTP request
+
+    Requests are labelled by their full route template, including the \
+        root path and router prefix (e.g. \
+        /dspaces/obj/{obj_name}/{obj_version}), rather than their path, so \
+        that the number of series stays bounded; requests that match no \
+        route are labelled 'unmatched'. Bodies are counted as they stream \
+        through, without buffering.
+    '''
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        method = scope['method']
+        start = time.perf_counter()
+        received = sent = 0
+
+        async def counting_receive():
+            nonlocal received
+            message = await receive()
+            received += len(message.get('body', b''))
+            return message
+
+        async def counting_send(message):
+            nonlocal sent
+            if message['type'] == 'http.response.body':
+                sent += len(message.get('body', b''))
+            await send(message)
+
+        in_flight = _requests_in_flight(method)
+        in_flight.inc()
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        finally:
+            in_flight.dec()
+            route = get_route_label(scope)
+            _request_latency(method, route).observe(time.perf_counter() - start)
+            if received:
+                _request_bytes(method, route).inc(received)
+            if sent:
+                _response_bytes(method, route).inc(sent)
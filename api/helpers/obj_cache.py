@@ -0,0 +1,165 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from api.config import dspaces_settings
+from api.helpers.box_index import BoxIndex
+
+class ObjectCache:
+    '''
+    A byte-budgeted LRU cache of object reads
+
+    Entries are keyed by (name, version, lb, ub), where name is already \
+        namespace-qualified. Object versions are treated as immutable, except \
+        that a put through the API invalidates any cached box of the same name \
+        and version that it overlaps. Cached arrays are marked read-only.
+
+    The cached boxes of each (name, version) are kept in a spatial index, so \
+        a request for a box that lies inside a cached box is answered with a \
+        slice view of the cached array.
+
+    Parameters
+    ----------
+    max_bytes
+        The total size of the cached arrays that may be held. Zero disables \
+            the cache.
+    '''
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._generations = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'containment_hits': 0,
+            'misses': 0,
+            'bytes_saved': 0,
+            'evictions': 0,
+            'invalidations': 0
+        }
+
+    def generation(self, name: str, version: int) -> int:
+        '''
+        Get the write generation of an object version
+
+        A reader takes the generation before fetching from the backend and \
+            passes it to put(), so that a result fetched concurrently with an \
+            overlapping write is not cached.
+        '''
+        with self._lock:
+            return self._generations.get((name, version), 0)
+
+    def get(self, name: str, version: int, lb: tuple, ub: tuple) -> np.ndarray | None:
+        '''
+        Look up a cached read
+
+        Returns
+        -------
+        The cached array or a read-only view into a cached array that \
+            contains lb, ub, or None on a miss
+        '''
+        key = (name, version, lb, ub)
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                data, key = self._get_containing(name, version, lb, ub)
+                if data is None:
+                    self._stats['misses'] += 1
+                    return None
+                self._stats['containment_hits'] += 1
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            self._stats['bytes_saved'] += data.nbytes
+            return data
+
+    def _get_containing(self, name: str, version: int, lb: tuple, ub: tuple):
+        index = self._versions.get((name, version))
+        if index is None:
+            return None, None
+        for key in index.containing(lb, ub):
+            data = self._entries[key]
+            clb, cub = key[2], key[3]
+            # a read can come back truncated or projected relative to its box,
+            # in which case it can't be sliced by coordinates
+            if data.shape != tuple([b-a+1 for a,b in zip(clb, cub)]):
+                continue
+            view = data[tuple([slice(a-c, b-c+1) for a,b,c in zip(lb, ub, clb)])]
+            return view, key
+        return None, None
+
+    def put(self, name: str, version: int, lb: tuple, ub: tuple, data: np.ndarray, generation: int):
+        '''
+        Add a read to the cache, evicting the least recently used entries to \
+            stay within budget
+
+        Parameters
+        ----------
+        generation
+            The generation of (name, version) taken before data was fetched. \
+                If a write has happened since, data is not cached.
+        '''
+        if data.nbytes > self.max_bytes:
+            return
+        key = (name, version, lb, ub)
+        data.flags.writeable = False
+        with self._lock:
+            if self._generations.get((name, version), 0) != generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = data
+            self._versions.setdefault((name, version), BoxIndex()).insert(key, lb, ub)
+            self._bytes += data.nbytes
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._stats['evictions'] += 1
+
+    def invalidate(self, name: str, version: int, lb: tuple, ub: tuple):
+        '''
+        Drop every cached box of (name, version) that overlaps lb, ub
+        '''
+        with self._lock:
+            self._generations[(name, version)] = self._generations.get((name, version), 0) + 1
+            index = self._versions.get((name, version))
+            if index is None:
+                return
+            for key in index.intersecting(lb, ub):
+                self._remove(key)
+                self._stats['invalidations'] += 1
+
+    def _remove(self, key: tuple):
+        data = self._entries.pop(key)
+        self._bytes -= data.nbytes
+        index = self._versions[key[:2]]
+        index.remove(key)
+        if not len(index):
+            del self._versions[key[:2]]
+
+    def stats(self) -> dict:
+        '''
+        Report cache usage
+
+        Returns
+        -------
+        A dict with the byte budget and usage, the number of entries, and \
+            counters for hits (and how many of them were answered by slicing \
+            a larger cached box), misses, bytes served from cache, evictions \
+            and invalidations
+        '''
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            stats['bytes'] = self._bytes
+        stats['max_bytes'] = self.max_bytes
+        return stats
+
+def get_cache() -> ObjectCache:
+    with get_cache.lock:
+        if get_cache.cache is None:
+            get_cache.cache = ObjectCache(max_bytes = dspaces_settings.dspaces_cache_bytes)
+    return get_cache.cache
+get_cache.cache = None
+get_cache.lock = threading.Lock()
@@ -0,0 +1,98 @@
+import asyncio
+import time
+
+from api.config import dspaces_settings
+from api.helpers.dspaces_client import get_pool
+from api.helpers.executor import get_executor
+
+class Readiness:
+    '''
+    Tracks whether the backend can serve requests
+
+    At startup, warm_up() opens backend connections ahead of the first \
+        request. Afterwards, check() reports readiness from the last \
+        successful backend call, and only probes the backend again once \
+        that result is older than the pool's probe interval. The embedded \
+        backend is always ready.
+    '''
+    def __init__(self):
+        self._lock = None
+        self._status = {
+            'backend': dspaces_settings.dspaces_backend,
+            'ready': dspaces_settings.dspaces_backend == 'embedded',
+            'connections': 0,
+            'error': None,
+            'checked_at': None
+        }
+        self._checked = None
+
+    def _record(self, ready: bool, error: str = None, connections: int = None):
+        self._status['ready'] = ready
+        self._status['error'] = error
+        if connections is not None:
+            self._status['connections'] = connections
+        self._status['checked_at'] = time.time()
+        self._checked = time.monotonic()
+
+    async def warm_up(self, connections: int, timeout: float):
+        '''
+        Open backend connections concurrently
+
+        Parameters
+        ----------
+        connections
+            How many connections to open, up to the pool size
+        timeout
+            How long to wait for them, in seconds. Connections still being \
+                made after this are left to finish in the background.
+        '''
+        if dspaces_settings.dspaces_backend == 'embedded' or connections <= 0:
+            return
+        pool = get_pool()
+        tasks = [asyncio.ensure_future(asyncio.to_thread(pool.warm)) for _ in range(min(connections, pool.size))]
+        done, pending = await asyncio.wait(tasks, timeout=timeout)
+        errors = [t.exception() for t in done if t.exception() is not None]
+        opened = len(done) - len(errors)
+        if opened:
+            self._record(True, connections=opened)
+        elif errors:
+            self._record(False, f'{type(errors[0]).__name__}: {errors[0]}', connections=0)
+        else:
+            self._record(False, f'no connection made within {timeout}s', connections=0)
+
+    async def check(self, timeout: float) -> dict:
+        '''
+        Report backend readiness, probing the backend if the last result is stale
+
+        Parameters
+        ----------
+        timeout
+            How long to wait for a probe, in seconds
+
+        Returns
+        -------
+        A dict with the backend type, whether it is ready, the number of \
+            connections opened at warm-up, the last error, and the time of \
+            the last check
+        '''
+        if dspaces_settings.dspaces_backend == 'embedded':
+            return dict(self._status)
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            fresh = self._checked is not None and time.monotonic() - self._checked < dspaces_settings.dspaces_pool_probe_interval
+            if not (fresh and self._status['ready']):
+                try:
+                    await asyncio.wait_for(get_executor().run('GetVars', get_pool().call, 'GetVars'), timeout)
+                    self._record(True)
+                except asyncio.TimeoutError:
+                    self._record(False, f'backend did not respond within {timeout}s')
+                except Exception as e:
+                    self._record(False, f'{type(e).__name__}: {e}')
+            return dict(self._status)
+
+def get_readiness() -> Readiness:
+    if get_readiness.readiness is None:
+        get_readiness.readiness = Readiness()
+    return get_readiness.readiness
+get_readiness.readiness = None
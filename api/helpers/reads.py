@@ -0,0 +1,87 @@
+import asyncio
+
+import numpy as np
+
+from api.helpers.bounding_box import Corners, get_corners_from_bounds
+from api.helpers.dspaces_client import nspace_name
+from api.helpers.executor import get_executor
+from api.helpers.obj_cache import get_cache
+from api.helpers.single_flight import get_single_flight
+from api.helpers.watch import get_watch_hub
+from api.models.dspaces_model import BoundingBox
+from api.services.dspaces_services import get_dspaces_obj
+
+async def read_obj(namespace: str, name: str, version: int, box: BoundingBox | Corners, timeout: int = 0) -> np.ndarray | None:
+    '''
+    Read an object from the object cache, or else from the backend
+
+    The cache is consulted on the event loop, so that hits never wait for \
+        an executor slot. Concurrent identical misses are coalesced before \
+        taking one, so that only a single backend read is made for them and \
+        the others hold neither a slot nor a worker thread while they wait.
+
+    A read of an object that is not stored yet can wait for it. The wait \
+        happens on the event loop, on the variable's watcher (see \
+        WatchHub), and each notification of an overlapping object of the \
+        version is followed by a non-blocking backend read, so that waiting \
+        reads hold no executor slot or backend connection.
+
+    Parameters
+    ----------
+    namespace
+        The namespace of the request
+    name
+        The object name
+    version
+        The object version
+    box
+        The space to read
+    timeout
+        How long to wait for the object to be stored if it is not yet, in \
+            milliseconds
+
+    Returns
+    -------
+    A read-only array, or None if the object is not found
+    '''
+    lb, ub = get_corners_from_bounds(box)
+    name = nspace_name(namespace, name)
+    data = await _read(name, version, lb, ub)
+    if data is not None or timeout <= 0:
+        return data
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout / 1000
+    hub = get_watch_hub()
+    queue = await hub.subscribe(name)
+    try:
+        # objects stored before the watcher's first poll are not notified
+        if await hub.wait_ready(name, max(deadline - loop.time(), 0)):
+            data = await _read(name, version, lb, ub)
+        while data is None:
+            try:
+                event = await asyncio.wait_for(queue.get(), max(deadline - loop.time(), 0))
+            except asyncio.TimeoutError:
+                return None
+            if event['version'] == version and \
+                    all(a <= d and b >= c for a, b, c, d in zip(event['lb'], event['ub'], lb, ub)):
+                data = await _read(name, version, lb, ub)
+        return data
+    finally:
+        hub.unsubscribe(name, queue)
+
+async def _read(name: str, version: int, lb: tuple, ub: tuple) -> np.ndarray | None:
+    cache = get_cache()
+    data = cache.get(name, version, lb, ub)
+    if data is not None:
+        return data
+    # a read made after a put through the API must not share one made before it
+    return await get_single_flight().do(
+        ('Get', name, version, lb, ub, cache.generation(name, version)),
+        get_executor().run,
+        'Get',
+        get_dspaces_obj,
+        namespace=None,
+        name=name,
+        version=version,
+        box=Corners(lb, ub)
+    )
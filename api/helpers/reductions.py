@@ -0,0 +1,68 @@
+import numpy as np
+
+from api.models.dspaces_model import Reduction
+
+def _to_json(value):
+    value = np.asarray(value)
+    if value.dtype.kind == 'f':
+        value = np.where(np.isfinite(value), value, None)
+    return value.tolist()
+
+def _get_axes(reduction: Reduction, ndim: int) -> tuple[int, ...] | None:
+    if reduction.axes is None:
+        return None
+    axes = tuple([a + ndim if a < 0 else a for a in reduction.axes])
+    if any([a < 0 or a >= ndim for a in axes]) or len(set(axes)) != len(axes):
+        raise ValueError(f'invalid axes {reduction.axes} for {ndim}-dimensional data')
+    return axes
+
+def apply_reduction(data: np.ndarray, reduction: Reduction) -> dict:
+    '''
+    Evaluate a single reduction over an array
+
+    Parameters
+    ----------
+    data
+        The array to reduce
+    reduction
+        The reduction to apply
+
+    Returns
+    -------
+    A dict with the op and axes of the reduction and its result. For \
+        histograms the result is given as counts and bin edges; otherwise \
+        as a value (nested lists for array results) and its shape. \
+        Non-finite floating point results are returned as None.
+
+    Raises
+    ------
+    ValueError
+        If the reduction's parameters are invalid for data
+    '''
+    axes = _get_axes(reduction, data.ndim)
+    result = {'op': reduction.op, 'axes': reduction.axes}
+    if reduction.op == 'histogram':
+        if axes is not None:
+            raise ValueError('histogram does not take axes')
+        counts, edges = np.histogram(data, bins=reduction.bins, range=reduction.range)
+        result.update(counts=counts.tolist(), edges=_to_json(edges))
+        return result
+    if reduction.op == 'percentile':
+        if not reduction.q or any([not 0 <= q <= 100 for q in reduction.q]):
+            raise ValueError('percentile needs q values in [0, 100]')
+        value = np.percentile(data, reduction.q, axis=axes)
+        result['q'] = reduction.q
+    else:
+        value = getattr(np, reduction.op)(data, axis=axes)
+    result.update(shape=list(np.shape(value)), value=_to_json(value))
+    return result
+
+def apply_reductions(data: np.ndarray, reductions: list[Reduction]) -> list[dict]:
+    '''
+    Evaluate a list of reductions over an array
+
+    Returns
+    -------
+    A list of results, as returned by apply_reduction, in order
+    '''
+    return [apply_reduction(data, r) for r in reductions]
@@ -0,0 +1,66 @@
+import asyncio
+
+class SingleFlight:
+    '''
+    Coalesce concurrent identical calls into one
+
+    While a call for a given key is in flight, further calls with the same \
+        key wait for it and receive its result, or its exception, instead of \
+        making their own call. Callers wait on the event loop, so that only \
+        the first caller of a key takes an executor slot and a worker thread.
+    '''
+    def __init__(self):
+        self._calls = {}
+        self._stats = {
+            'calls': 0,
+            'shared': 0
+        }
+
+    async def do(self, key, fn, /, *args, **kwargs):
+        '''
+        Await fn(*args, **kwargs), unless a call for key is already in flight
+
+        Parameters
+        ----------
+        key
+            A hashable identifying the call
+        fn
+            The coroutine function to call if no call for key is in flight, \
+                e.g. DSExecutor.run
+
+        Returns
+        -------
+        The return value of the call for key. Exceptions are raised in every \
+            caller that shared the call. A caller that is cancelled stops \
+            waiting, but the call carries on for the others.
+        '''
+        task = self._calls.get(key)
+        if task is None:
+            task = self._calls[key] = asyncio.ensure_future(fn(*args, **kwargs))
+            def done(_):
+                del self._calls[key]
+                if not task.cancelled():
+                    # retrieved here in case every caller was cancelled
+                    task.exception()
+            task.add_done_callback(done)
+            self._stats['calls'] += 1
+        else:
+            self._stats['shared'] += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        '''
+        Report coalescing activity
+
+        Returns
+        -------
+        A dict with the number of calls made, the number of callers that \
+            shared another's call instead, and the number of calls in flight
+        '''
+        stats = dict(self._stats)
+        stats['in_flight'] = len(self._calls)
+        return stats
+
+def get_single_flight() -> SingleFlight:
+    return get_single_flight.flight
+get_single_flight.flight = SingleFlight()
@@ -0,0 +1,249 @@
+import numpy as np
+
+from api.models import BoundingBox
+from api.helpers.bounding_box import Corners, get_box_dims, get_corners_from_bounds
+
+# NumPy type numbers to dtypes. NumPy 1.x also keyed sctypeDict by type
+# number, but 2.x no longer does.
+_ELEMENT_TYPES = {np.dtype(t).num: np.dtype(t) for t in set(np.sctypeDict.values())}
+
+def get_element_dtype(element_type: int) -> np.dtype:
+    '''
+    Get the dtype for an element type
+
+    Parameters
+    ----------
+    element_type
+        The type of the elements, referring NumPy scalar types by type number
+
+    Raises
+    ------
+    ValueError
+        If element_type is not a NumPy type number
+    '''
+    dtype = _ELEMENT_TYPES.get(element_type)
+    if dtype is None:
+        raise ValueError(f"unknown element type {element_type}")
+    return dtype
+
+def get_array_view(data: np.ndarray) -> memoryview:
+    '''
+    Get a flat byte view of an array's buffer
+
+    Parameters
+    ----------
+    data
+        The array to view. A copy is only made if it is not C-contiguous.
+
+    Returns
+    -------
+    A one-dimensional, unsigned byte memoryview of the array in row major order
+    '''
+    return memoryview(np.ascontiguousarray(data)).cast('B')
+
+async def iter_array_chunks(data: np.ndarray, chunk_size: int, start: int = 0, end: int = None):
+    '''
+    Iterate over the bytes of an array in bounded chunks without copying
+
+    Parameters
+    ----------
+    data
+        The array to serialize
+    chunk_size
+        The maximum number of bytes per chunk
+    start
+        The first byte to send
+    end
+        One past the last byte to send, or None for the end of the array
+
+    Yields
+    ------
+    memoryview slices of the array buffer, in row major order
+    '''
+    view = get_array_view(data)[start:end]
+    for offset in range(0, view.nbytes, chunk_size):
+        yield view[offset:offset+chunk_size]
+
+def parse_range(value: str, size: int) -> tuple[int, int] | None:
+    '''
+    Parse an HTTP Range header against a body of known size
+
+    Parameters
+    ----------
+    value
+        The Range header, e.g. "bytes=0-1023", "bytes=1024-" or "bytes=-512"
+    size
+        The size of the full body in bytes
+
+    Returns
+    -------
+    The start and (exclusive) end of the requested range, or None if the \
+        header should be ignored and the full body sent, which is the case \
+        for multiple ranges and units other than bytes
+
+    Raises
+    ------
+    ValueError
+        If the range is malformed or cannot be satisfied
+    '''
+    unit, _, spec = value.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in spec:
+        return None
+    first, _, last = spec.strip().partition('-')
+    if not first:
+        length = int(last)
+        if length <= 0:
+            raise ValueError('unsatisfiable range')
+        return (max(size - length, 0), size)
+    start = int(first)
+    end = int(last) + 1 if last else size
+    if start >= size or end <= start:
+        raise ValueError('unsatisfiable range')
+    return (start, min(end, size))
+
+def get_range_rows(dims: list[int], element_size: int, start: int, end: int) -> tuple[int, int]:
+    '''
+    Find the rows of an array that hold a byte range of its row major \
+        serialization
+
+    Parameters
+    ----------
+    dims
+        The dimensions of the array
+    element_size
+        The number of bytes per element
+    start, end
+        The byte range, end exclusive
+
+    Returns
+    -------
+    The first and (exclusive) last index along the leading dimension of \
+        the smallest slab of whole rows that holds the range
+    '''
+    row = element_size * int(np.prod(dims[1:], dtype=np.int64))
+    return (start // row, -(-end // row))
+
+def alloc_obj_array(box: BoundingBox | Corners, element_size: int, element_type: int) -> np.ndarray:
+    '''
+    Preallocate an array to receive the data of an object
+
+    Parameters
+    ----------
+    box
+        The space the object occupies
+    element_size
+        The number of bytes per element
+    element_type
+        The type of the elements, referring NumPy scalar types
+
+    Returns
+    -------
+    An uninitialized, C-contiguous array shaped by the spans of box
+
+    Raises
+    ------
+    ValueError
+        If element_type is unknown, or element_size does not match its size
+    '''
+    dtype = get_element_dtype(element_type)
+    if dtype.itemsize != element_size:
+        raise ValueError("element size does not match element type")
+    return np.empty(get_box_dims(box), dtype=dtype)
+
+async def read_into_array(stream, data: np.ndarray) -> None:
+    '''
+    Fill a preallocated array from an asynchronous stream of bytes
+
+    Parameters
+    ----------
+    stream
+        An async iterator of bytes-like chunks, such as Request.stream()
+    data
+        A C-contiguous array to fill, in row major order
+
+    Raises
+    ------
+    ValueError
+        As soon as the stream overruns the array, or at the end of the stream if it \
+            did not fill the array exactly
+    '''
+    view = get_array_view(data)
+    offset = 0
+    async for chunk in stream:
+        end = offset + len(chunk)
+        if end > view.nbytes:
+            raise ValueError("data object does not match size parameters")
+        view[offset:end] = chunk
+        offset = end
+    if offset != view.nbytes:
+        raise ValueError("data object does not match size parameters")
+
+def get_obj_meta(data: np.ndarray, box: BoundingBox | Corners, stride: tuple[int, ...] = None, method: str = 'sample') -> dict:
+    '''
+    Describe an object response
+
+    Parameters
+    ----------
+    data
+        The array being returned
+    box
+        The bounding box that was requested
+    stride
+        The decimation factor applied to the data, if any
+    method
+        The decimation method; 'sample' responses end at the last sampled \
+            element, 'mean' responses at the last element of the last block
+
+    Returns
+    -------
+    A dict with the tag, element_size, lower_bounds, upper_bounds and dims \
+        of the response, as carried by the X-DS-* headers, and the stride if \
+        the data was decimated
+    '''
+    lb, _ = get_corners_from_bounds(box)
+    strides = stride or [1] * len(lb)
+    if method == 'mean':
+        upper = [a+sp*s-1 for (a,sp,s) in zip(lb, data.shape, strides)]
+    else:
+        upper = [a+(sp-1)*s for (a,sp,s) in zip(lb, data.shape, strides)]
+    meta = {
+        'tag': data.dtype.num,
+        'element_size': data.itemsize,
+        'lower_bounds': list(lb),
+        'upper_bounds': upper,
+        'dims': list(data.shape)
+    }
+    if stride is not None:
+        meta['stride'] = list(stride)
+    return meta
+
+def get_obj_headers(data: np.ndarray, box: BoundingBox | Corners, stride: tuple[int, ...] = None, method: str = 'sample') -> dict[str, str]:
+    '''
+    Build the X-DS-* headers that describe an object response
+
+    Parameters
+    ----------
+    data
+        The array being returned
+    box
+        The bounding box that was requested
+    stride
+        The decimation factor applied to the data, if any
+    method
+        The decimation method used
+
+    Returns
+    -------
+    A dict of header names and values
+    '''
+    meta = get_obj_meta(data, box, stride, method)
+    headers = {
+        'X-DS-Tag': str(meta['tag']),
+        'X-DS-Element-Size': str(meta['element_size']),
+        'X-DS-Lower-Bounds': ','.join([str(x) for x in meta['lower_bounds']]),
+        'X-DS-Upper-Bounds': ','.join([str(x) for x in meta['upper_bounds']]),
+        'X-DS-Dims': ','.join([str(x) for x in meta['dims']])
+    }
+    if stride is not None:
+        headers['X-DS-Stride'] = ','.join([str(x) for x in meta['stride']])
+    return headers
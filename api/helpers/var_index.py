@@ -0,0 +1,257 @@
+import asyncio
+import threading
+import time
+
+import numpy as np
+
+from api.config import dspaces_settings
+from api.helpers.box_index import BoxIndex
+from api.helpers.executor import get_executor
+from api.services.dspaces_services import get_dspaces_var_keys
+
+MAX_VERSION = np.iinfo(np.int64).max
+
+class VarIndex:
+    '''
+    A spatial index over the stored objects of one variable
+
+    Each object is indexed as a box with its version as an extra leading \
+        dimension, so that a query over a box and a range of versions is a \
+        single vectorized intersection test however many versions are held.
+    '''
+    def __init__(self):
+        self.index = BoxIndex()
+        self.loaded_at = None
+        self.loading = None
+        self.refreshing = None
+        self._recent = set()
+        self._keys = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def add(self, version: int, lb: tuple, ub: tuple):
+        '''
+        Index a stored object
+        '''
+        key = (version, tuple(lb), tuple(ub))
+        with self._lock:
+            if key not in self.index:
+                self.index.insert(key, (version, *lb), (version, *ub))
+                self._keys = None
+            self._recent.add(key)
+
+    def refresh(self, name: str):
+        '''
+        Bring the index up to date with the backend's object list
+
+        Objects the backend no longer holds are dropped, unless they were \
+            added while the list was being fetched.
+        '''
+        with self._lock:
+            self._recent = set()
+        fetched = set(get_dspaces_var_keys(None, name))
+        with self._lock:
+            for key in self.index:
+                if key not in fetched and key not in self._recent:
+                    self.index.remove(key)
+                    self._keys = None
+            for key in fetched:
+                if key not in self.index:
+                    version, lb, ub = key
+                    self.index.insert(key, (version, *lb), (version, *ub))
+                    self._keys = None
+            self.loaded_at = time.monotonic()
+
+    def keys(self) -> list[tuple]:
+        '''
+        Get every indexed object, as (version, lb, ub) ordered by version \
+            and then by box
+
+        The sorted list is kept until the index changes.
+        '''
+        with self._lock:
+            if self._keys is None:
+                self._keys = sorted(self.index)
+            return self._keys
+
+    def query(self, lb: tuple, ub: tuple, min_version: int = 0, max_version: int = MAX_VERSION) -> list[tuple]:
+        '''
+        Find the objects that intersect a box
+
+        Parameters
+        ----------
+        lb, ub
+            The inclusive corners of the box
+        min_version, max_version
+            The inclusive range of versions to search
+
+        Returns
+        -------
+        The (version, lb, ub) of every matching object, ordered by version \
+            and then by box
+        '''
+        with self._lock:
+            keys = self.index.intersecting((min_version, *lb), (max_version, *ub))
+        return sorted(keys)
+
+def get_coverage(boxes: list[tuple], lb: tuple, ub: tuple, max_cells: int, max_gaps: int) -> dict:
+    '''
+    Summarize how much of a box is covered by a set of boxes
+
+    The union is computed exactly on a grid compressed to the boxes' \
+        corners, so its cost depends on the number of distinct corner \
+        coordinates rather than on the volume of the box.
+
+    Parameters
+    ----------
+    boxes
+        The (lb, ub) corners of the covering boxes
+    lb, ub
+        The inclusive corners of the box
+    max_cells
+        The largest compressed grid that will be built
+    max_gaps
+        The most uncovered regions that will be listed
+
+    Returns
+    -------
+    A dict with the box's volume, the number of covered elements, the \
+        covered fraction, and the uncovered regions as (lb, ub) corners, \
+        listed up to max_gaps with a flag set if there were more
+
+    Raises
+    ------
+    ValueError
+        If the compressed grid would have more than max_cells cells
+    '''
+    lb = np.asarray(lb, dtype=np.int64)
+    ub = np.asarray(ub, dtype=np.int64) + 1
+    if boxes:
+        blb = np.maximum(np.array([b[0] for b in boxes], dtype=np.int64), lb)
+        bub = np.minimum(np.array([b[1] for b in boxes], dtype=np.int64) + 1, ub)
+    else:
+        blb = bub = np.empty((0, len(lb)), dtype=np.int64)
+    edges = [np.unique(np.concatenate([[lb[d], ub[d]], blb[:, d], bub[:, d]])) for d in range(len(lb))]
+    shape = [len(e) - 1 for e in edges]
+    if np.prod(shape, dtype=np.float64) > max_cells:
+        raise ValueError("the objects are too irregular to compute coverage over this box")
+    covered = np.zeros(shape, dtype=bool)
+    for a, b in zip(blb, bub):
+        covered[tuple([slice(np.searchsorted(e, x), np.searchsorted(e, y)) for e, x, y in zip(edges, a, b)])] = True
+    sizes = [np.diff(e) for e in edges]
+    cell_volume = sizes[0]
+    for s in sizes[1:]:
+        cell_volume = np.multiply.outer(cell_volume, s)
+    volume = int(np.prod(ub - lb))
+    filled = int(cell_volume[covered].sum())
+    gaps = []
+    uncovered = np.argwhere(~covered)
+    for cell in uncovered[:max_gaps]:
+        gaps.append((
+            tuple([int(e[i]) for e, i in zip(edges, cell)]),
+            tuple([int(e[i+1]) - 1 for e, i in zip(edges, cell)])
+        ))
+    return {
+        'volume': volume,
+        'covered': filled,
+        'fraction': filled / volume if volume else 1.0,
+        'gaps': gaps,
+        'gaps_truncated': len(uncovered) > max_gaps
+    }
+
+class IndexCatalog:
+    '''
+    The spatial indexes of the variables that have been queried
+
+    A variable's index is built from the backend's object list on its \
+        first query and served from memory afterwards. Once it is older \
+        than ttl, it is still served while it is refreshed incrementally in \
+        the background, to pick up objects stored by other DataSpaces \
+        clients. Objects stored through the API are added as soon as they \
+        are stored.
+
+    Parameters
+    ----------
+    ttl
+        Seconds after which an index is refreshed in the background
+    '''
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._vars = {}
+        self._stats = {
+            'queries': 0,
+            'loads': 0,
+            'background_loads': 0,
+            'load_errors': 0
+        }
+
+    async def get(self, name: str) -> VarIndex:
+        '''
+        Get the index of a variable, loading it first if this is its first \
+            query
+
+        Parameters
+        ----------
+        name
+            The namespace-qualified variable name
+        '''
+        self._stats['queries'] += 1
+        var = self._vars.get(name)
+        if var is None:
+            var = self._vars[name] = VarIndex()
+            var.loading = asyncio.Lock()
+        if var.loaded_at is None:
+            async with var.loading:
+                if var.loaded_at is None:
+                    self._stats['loads'] += 1
+                    try:
+                        await get_executor().run('GetVarObjs', var.refresh, name)
+                    except Exception:
+                        self._stats['load_errors'] += 1
+                        raise
+        elif time.monotonic() - var.loaded_at > self.ttl and var.refreshing is None:
+            var.refreshing = asyncio.create_task(self._refresh(name, var))
+        if not len(var):
+            # don't hold on to indexes of variables that do not exist
+            self._vars.pop(name, None)
+        return var
+
+    async def _refresh(self, name: str, var: VarIndex):
+        self._stats['background_loads'] += 1
+        try:
+            async with var.loading:
+                await get_executor().run('GetVarObjs', var.refresh, name)
+        except Exception:
+            self._stats['load_errors'] += 1
+        finally:
+            var.refreshing = None
+
+    def add(self, name: str, version: int, lb: tuple, ub: tuple):
+        '''
+        Index an object stored through the API, if its variable is indexed
+        '''
+        var = self._vars.get(name)
+        if var is not None:
+            var.add(version, lb, ub)
+
+    def stats(self) -> dict:
+        '''
+        Report index usage
+
+        Returns
+        -------
+        A dict with the number of variables and objects indexed, and \
+            counters for queries, loads, background loads and their errors
+        '''
+        stats = dict(self._stats)
+        stats['variables'] = len(self._vars)
+        stats['objects'] = sum([len(var) for var in self._vars.values()])
+        return stats
+
+def get_index_catalog() -> IndexCatalog:
+    if get_index_catalog.catalog is None:
+        get_index_catalog.catalog = IndexCatalog(ttl = dspaces_settings.dspaces_index_ttl)
+    return get_index_catalog.catalog
+get_index_catalog.catalog = None
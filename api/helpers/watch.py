@@ -0,0 +1,200 @@
+import asyncio
+
+from api.config import dspaces_settings
+from api.helpers.executor import get_executor
+from api.services.dspaces_services import get_dspaces_var_keys
+
+class VarWatcher:
+    '''
+    Watches one variable for new objects and notifies its subscribers
+
+    A single task polls the backend's object list for the variable and \
+        fans out every object not seen before to all subscribers, so that \
+        the backend sees one query per interval however many clients are \
+        watching. Objects stored through the API are published as soon as \
+        the put completes, without waiting for the next poll.
+
+    Parameters
+    ----------
+    name
+        The namespace-qualified variable name
+    interval
+        Seconds between backend polls
+    queue_size
+        The number of undelivered events kept per subscriber. When a \
+            subscriber falls further behind, its oldest events are dropped.
+    '''
+    def __init__(self, name: str, interval: float, queue_size: int):
+        self.name = name
+        self.interval = interval
+        self.queue_size = queue_size
+        self.subscribers = set()
+        self.known = set()
+        self.ready = asyncio.Event()
+        self.task = None
+        self.stats = {
+            'polls': 0,
+            'poll_errors': 0,
+            'events': 0,
+            'dropped': 0
+        }
+
+    def start(self):
+        self.task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+
+    async def _run(self):
+        while True:
+            try:
+                objs = await get_executor().run('GetVarObjs', get_dspaces_var_keys, None, self.name)
+                self.stats['polls'] += 1
+                for version, lb, ub in objs:
+                    # the first poll only records what is already stored
+                    self.publish(version, lb, ub, notify=self.ready.is_set())
+                self.ready.set()
+            except Exception:
+                self.stats['poll_errors'] += 1
+            await asyncio.sleep(self.interval)
+
+    def publish(self, version: int, lb: tuple, ub: tuple, notify: bool = True):
+        '''
+        Record an object of the variable, notifying subscribers if it is new
+        '''
+        key = (version, lb, ub)
+        if key in self.known:
+            return
+        self.known.add(key)
+        if notify:
+            event = {'version': version, 'lb': list(lb), 'ub': list(ub)}
+            for queue in self.subscribers:
+                self._offer(queue, event)
+
+    def _offer(self, queue: asyncio.Queue, event: dict):
+        if queue.full():
+            queue.get_nowait()
+            self.stats['dropped'] += 1
+        queue.put_nowait(event)
+        self.stats['events'] += 1
+
+    def replay(self, queue: asyncio.Queue, since: int):
+        '''
+        Queue the known objects with a version newer than since
+        '''
+        for version, lb, ub in sorted(self.known):
+            if version > since:
+                self._offer(queue, {'version': version, 'lb': list(lb), 'ub': list(ub)})
+
+class WatchHub:
+    '''
+    The set of variable watchers, started on a variable's first \
+        subscription and stopped when its last subscriber leaves
+
+    All methods must be called from the event loop.
+    '''
+    def __init__(self, interval: float, queue_size: int):
+        self.interval = interval
+        self.queue_size = queue_size
+        self._watchers = {}
+        self._stopped = {
+            'polls': 0,
+            'poll_errors': 0,
+            'events': 0,
+            'dropped': 0
+        }
+
+    async def subscribe(self, name: str, since: int = None, timeout: float = None) -> asyncio.Queue:
+        '''
+        Subscribe to the new objects of a variable
+
+        Parameters
+        ----------
+        name
+            The namespace-qualified variable name
+        since
+            If given, objects already stored with a newer version are \
+                delivered first
+        timeout
+            How long to wait for the watcher's first poll when replaying, \
+                in seconds
+
+        Returns
+        -------
+        A queue of events, each a dict with the object's version, lb and ub
+        '''
+        watcher = self._watchers.get(name)
+        if watcher is None:
+            watcher = self._watchers[name] = VarWatcher(name, self.interval, self.queue_size)
+            watcher.start()
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        watcher.subscribers.add(queue)
+        if since is not None:
+            await self.wait_ready(name, timeout)
+            watcher.replay(queue, since)
+        return queue
+
+    async def wait_ready(self, name: str, timeout: float) -> bool:
+        '''
+        Wait for the first poll of a subscribed variable, after which every \
+            object stored is notified
+
+        Returns
+        -------
+        False if the poll did not complete within timeout seconds
+        '''
+        watcher = self._watchers.get(name)
+        if watcher is None:
+            return False
+        try:
+            await asyncio.wait_for(watcher.ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def unsubscribe(self, name: str, queue: asyncio.Queue):
+        watcher = self._watchers.get(name)
+        if watcher is None:
+            return
+        watcher.subscribers.discard(queue)
+        if not watcher.subscribers:
+            watcher.stop()
+            del self._watchers[name]
+            for k, v in watcher.stats.items():
+                self._stopped[k] += v
+
+    def publish(self, name: str, version: int, lb: tuple, ub: tuple):
+        '''
+        Notify the subscribers of a variable, if any, of a stored object
+        '''
+        watcher = self._watchers.get(name)
+        if watcher is not None:
+            watcher.publish(version, tuple(lb), tuple(ub))
+
+    def stats(self) -> dict:
+        '''
+        Report watch activity
+
+        Returns
+        -------
+        A dict with the number of watched variables and subscribers, and \
+            counters for backend polls and poll errors, events delivered \
+            and events dropped for subscribers that fell behind
+        '''
+        stats = dict(self._stopped)
+        for watcher in self._watchers.values():
+            for k, v in watcher.stats.items():
+                stats[k] += v
+        stats['variables'] = len(self._watchers)
+        stats['subscribers'] = sum([len(w.subscribers) for w in self._watchers.values()])
+        return stats
+
+def get_watch_hub() -> WatchHub:
+    if get_watch_hub.hub is None:
+        get_watch_hub.hub = WatchHub(
+            interval = dspaces_settings.dspaces_watch_interval,
+            queue_size = dspaces_settings.dspaces_watch_queue_size
+        )
+    return get_watch_hub.hub
+get_watch_hub.hub = None
@@ -3,6 +3,7 @@ from fastapi.middleware.cors import CORSMiddleware
 
 import api.routes as routes
 from .config import swagger_settings
+from .helpers.metrics import MetricsMiddleware
 from .configure_services import configure_services
 
 # Create a FastAPI app instance with custom Swagger UI settings
@@ -21,6 +22,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Record per-route latency, in-flight requests and body bytes for /metrics
+app.add_middleware(MetricsMiddleware)
+
 # Define an event handler for the 'startup' event to configure services on app
 # startup
 @app.on_event("startup")
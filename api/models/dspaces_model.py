@@ -1,3 +1,4 @@
+from typing import Literal
 from pydantic import BaseModel, Field, model_validator
 import json
 
@@ -15,12 +16,28 @@ class BoundingBox(BaseModel):
             return cls(**json.loads(value))
         return value
 
+class Reduction(BaseModel):
+    op: Literal['sum', 'mean', 'min', 'max', 'std', 'percentile', 'histogram']
+    axes: list[int] | None = Field(default=None, title="axes to reduce over; all axes if omitted")
+    q: list[float] | None = Field(default=None, title="percentiles to compute, in [0, 100]")
+    bins: int = Field(default=10, title="number of histogram bins", gt=0, le=4096)
+    range: tuple[float, float] | None = Field(default=None, title="histogram range; the data range if omitted")
+
+class ReductionRequest(BoundingBox):
+    bounds: list[Interval] | None = Field(default=None, title="box to reduce over; may be given in compact form instead")
+    reductions: list[Reduction] = Field(min_length=1, max_length=32)
+
 class DSObject(BaseModel):
     name: str
     namespace: str = None
     version: int
     bounds: list[Interval]
 
+class DSPutObject(DSObject):
+    element_size: int = Field(gt=0)
+    element_type: int = Field(gt=0)
+    length: int = Field(ge=0)
+
 class RequestList(BaseModel):
     requests: list[DSObject] = []
 
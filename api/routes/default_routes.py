@@ -1,9 +1,21 @@
 from fastapi import APIRouter
 
 from api.config import swagger_settings as settings
-from starlette.responses import RedirectResponse 
+from api.config import dspaces_settings
+from starlette.responses import JSONResponse, RedirectResponse, Response
+from api.helpers.metrics import METRICS_MEDIA_TYPE, get_metrics
+from api.helpers.readiness import get_readiness
 router = APIRouter()
 
 @router.get("/")
 async def index():
-    return RedirectResponse('/docs')
\ No newline at end of file
+    return RedirectResponse('/docs')
+
+@router.get("/metrics")
+async def metrics():
+    return Response(content=get_metrics(), media_type=METRICS_MEDIA_TYPE)
+
+@router.get("/ready")
+async def ready():
+    status = await get_readiness().check(dspaces_settings.dspaces_ready_timeout)
+    return JSONResponse(status, status_code=200 if status['ready'] else 503)
\ No newline at end of file
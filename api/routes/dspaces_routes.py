@@ -1,18 +1,168 @@
-from typing import Annotated
-from fastapi import APIRouter, HTTPException, Body, File, Form, Path, Query, Request, Response
+import asyncio
+from collections import deque
+from typing import Annotated, Literal
+import numpy as np
+from fastapi import APIRouter, HTTPException, Body, File, Form, Header, Path, Query, Request, Response, WebSocket, WebSocketDisconnect, WebSocketException
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 
-from api.models.dspaces_model import BoundingBox, DSObject, DSRegHandle, RequestList
+from api.models.dspaces_model import BoundingBox, DSObject, DSPutObject, DSRegHandle, ReductionRequest, RequestList
 from api.services.dspaces_services import *
 from api.config import dspaces_settings
+from api.helpers.bounding_box import Corners, parse_box, parse_corners, get_box_dims, get_box_volume, get_corners_from_bounds
+from api.helpers.executor import get_executor
+from api.helpers.dspaces_client import get_pool, nspace_name
+from api.helpers.embedded_client import get_store
+from api.helpers.obj_cache import get_cache
+from api.helpers.single_flight import get_single_flight
+from api.helpers.reads import read_obj
+from api.helpers.streaming import parse_range, get_range_rows, get_array_view, get_obj_headers, get_obj_meta, alloc_obj_array, read_into_array
+from api.helpers.framing import iter_frame, encode_frame, FrameReader, FRAMES_MEDIA_TYPE
+from api.helpers.formats import negotiate_format, serialize_obj, iter_parts, OCTET_STREAM
+from api.helpers.reductions import apply_reductions
+from api.helpers.exec_pool import get_exec_pool, ExecTimeout
+from api.helpers.fn_cache import get_fn_cache
+from api.helpers.decimate import decimate, parse_stride, DECIMATE_METHODS
+from api.helpers.encoding import encoded_response, get_request_encoding, iter_decoded, get_encoding_stats
+from api.helpers.json_response import json_response, dumps_json
+from api.helpers.etags import compute_etag, compute_meta_etag, etag_matches, format_etag, get_etag_memo
+from api.helpers.watch import get_watch_hub
+from api.helpers.var_index import get_index_catalog, get_coverage, MAX_VERSION
+from api.helpers.listings import get_listings, page_vars, page_objects, ListingError
 
 from dspaces import DSModuleError, DSRemoteFaultError, DSConnectionError
 
 router = APIRouter()
 
+IndexBox = Annotated[
+    str,
+    Query(
+        alias="box",
+        title="Bounding box",
+        description="Bounding box as comma-separated start:span pairs, e.g. 0:16,0:16"
+    )
+]
+
+MinVersion = Annotated[
+    int,
+    Query(
+        title="Minimum version",
+        description="The first version to search",
+        ge=0
+    )
+]
+
+MaxVersion = Annotated[
+    int,
+    Query(
+        title="Maximum version",
+        description="The last version to search",
+        ge=0
+    )
+]
+
+ListCursor = Annotated[
+    str,
+    Query(
+        title="Page cursor",
+        description="The X-DS-Next-Cursor of the previous page",
+        max_length=1024
+    )
+]
+
+ListLimit = Annotated[
+    int,
+    Query(
+        title="Page size",
+        description="The most items to list",
+        ge=1,
+        le=dspaces_settings.dspaces_listing_max_limit
+    )
+]
+
+def get_page_headers(next_cursor: str | None) -> dict:
+    '''
+    Get the headers of a page of a listing
+    '''
+    return {} if next_cursor is None else {'X-DS-Next-Cursor': next_cursor}
+
+def notify_put(namespace: str, name: str, version: int, box: BoundingBox | Corners):
+    '''
+    Let watchers and the spatial index know of an object stored through the API
+    '''
+    name = nspace_name(namespace, name)
+    lb, ub = get_corners_from_bounds(box)
+    get_watch_hub().publish(name, version, lb, ub)
+    get_index_catalog().add(name, version, lb, ub)
+    get_listings().invalidate(name)
+
+WaitTimeout = Annotated[
+    int,
+    Query(
+        title="Wait timeout",
+        description="Milliseconds to wait for the object to be stored if it is not yet",
+        ge=0,
+        le=dspaces_settings.dspaces_max_get_timeout
+    )
+]
+
+CompactBox = Annotated[
+    str,
+    Query(
+        alias="box",
+        title="Compact bounding box",
+        description="Bounding box as comma-separated start:span pairs, e.g. 0:16,0:16. Takes precedence over a box in the body."
+    )
+]
+
+CompactBoxHeader = Annotated[
+    str,
+    Header(
+        alias="X-DS-Box",
+        title="Compact bounding box",
+        description="Bounding box as comma-separated start:span pairs, as for the box query parameter"
+    )
+]
+
+def get_request_box(box: BoundingBox | None, compact: str | None, header: str | None) -> BoundingBox | Corners:
+    '''
+    Get the bounding box of an object request
+
+    Parameters
+    ----------
+    box
+        The box given in the request body, if any
+    compact
+        The box query parameter, in the compact start:span syntax
+    header
+        The X-DS-Box header, in the compact syntax
+
+    Returns
+    -------
+    The compact box, parsed straight into corners, if one was given (the \
+        query parameter taking precedence), or the body's box otherwise
+
+    Raises
+    ------
+    HTTPException
+        With status 400 if the compact box is malformed, or 422 if no box \
+        was given
+    '''
+    compact = compact if compact is not None else header
+    if compact is not None:
+        try:
+            return parse_box(compact)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    if box is None:
+        raise HTTPException(status_code=422, detail="missing bounding box")
+    return box
+
 @router.post("/obj/{obj_name}/{obj_version}",
              summary="Retrieve a DataSpaces object"
 )
-def ds_get(
+async def ds_get(
+    request: Request,
     obj_name: Annotated[
         str,
         Path(
@@ -35,7 +185,9 @@ def ds_get(
             title="Bounding box",
             description="Bounding box region to retrieve",
         )
-    ],
+    ] = None,
+    compact_box: CompactBox = None,
+    box_header: CompactBoxHeader = None,
     namespace: Annotated[
         str,
         Query(
@@ -43,7 +195,24 @@ def ds_get(
             description="Request namespace which defines the context of the query",
             max_length=48
         )
-    ] = None
+    ] = None,
+    stride: Annotated[
+        str,
+        Query(
+            title="Decimation stride",
+            description="Comma-separated per-dimension stride, or a single stride for all dimensions",
+            pattern=r"^\d+(,\d+)*$"
+        )
+    ] = None,
+    decimate_method: Annotated[
+        Literal[DECIMATE_METHODS],
+        Query(
+            alias="method",
+            title="Decimation method",
+            description="'sample' to keep every stride-th element, 'mean' to average stride-sized blocks"
+        )
+    ] = 'sample',
+    timeout: WaitTimeout = 0
 ):
     """
     Query DataSpaces for a data object:
@@ -57,11 +226,29 @@ def ds_get(
         pairs. The first of the pair defines the start of an interval, and \
         the second the size of the interval. For example, [(1,2),(3,4)] \
         defines the rectangle that starts at (1,3) and has dimensions 2x4 \
-        elements.
+        elements. The box can instead be given in the compact form \
+        `start:span,start:span`, e.g. `1:2,3:4`, in the **box** query \
+        parameter or the **X-DS-Box** header, which is cheaper to parse.
+    - **stride**: (optional) decimate the data before it is returned, for \
+        previews. Either one stride per dimension or a single stride for \
+        all of them, e.g. 4 or 1,4,4.
+    - **method**: how to decimate: `sample` (default) keeps every \
+        stride-th element, starting from the lower bound; `mean` averages \
+        each stride-sized block.
+    - **timeout**: (optional) if the object has not been stored yet, wait \
+        up to this many milliseconds for it before responding with 404, \
+        rather than polling. Bounded by the API's configuration. Objects \
+        stored through the API are picked up as soon as they are stored, \
+        those stored by other DataSpaces clients within the watch interval.
 
     Returns
     -------
     An octet-stream of the requested data, serialized in row major order.\
+    Self-describing formats can be requested instead with the Accept header: \
+    `application/x-npy` returns a NumPy .npy file that can be passed to \
+    `np.load`, and `application/vnd.apache.arrow.stream` (if pyarrow is \
+    installed) an Arrow IPC stream with a single fixed-shape tensor, whose \
+    schema metadata holds the X-DS-* values under the `dspaces` key. \
     The response will additionally contain custom headers necessary for \
     deserializing the data into an n-dimensional array, ane localizing it\
     relative to the global domain. These headers are:
@@ -75,30 +262,320 @@ def ds_get(
          might be truncated, projected, etc. relative to the requested bounds. In other\
          words, it may be that X-DS-Dims is not equal to the lower bounds subtracted\
          from the upper bounds; it may not even have the same dimensionality as the bounds.
+    - **X-DS-Stride**: the decimation stride, if any. X-DS-Dims then gives the \
+        decimated dimensions, and X-DS-Upper-Bounds the last sampled element \
+        (`sample`) or the end of the last averaged block (`mean`).
+
+    If the request's Accept-Encoding allows it, responses above a size \
+    threshold are compressed on the fly (zstd, lz4 or gzip, depending on \
+    the codecs installed) and marked with Content-Encoding.
+
+    A single byte range of the (uncompressed, serialized) response can be requested \
+    with a Range header, to resume a transfer or to download a large \
+    object over several parallel connections. Partial responses have \
+    status 206 and a Content-Range header. Objects that fit in the object \
+    cache are fetched from the backend once and every range is served from \
+    the cached copy. For larger objects returned as octet-streams without \
+    decimation, only the rows of the leading dimension that hold the range \
+    are read from the backend.
 
     Raises
     ------
     **HTTPException** if the object is not found in DataSpaces
     """
     obj_name = obj_name.replace("~", "/")
-    data = get_dspaces_obj(
-            namespace=namespace,
-            name=obj_name,
-            version=obj_version,
-            box=box,
+    box = get_request_box(box, compact_box, box_header)
+    media_type = negotiate_format(request.headers.get('accept'))
+    if stride is None:
+        response = await range_obj_response(request, namespace, obj_name, obj_version, box, media_type, timeout=timeout)
+        if response is not None:
+            return(response)
+    data, stride = await fetch_obj(namespace, obj_name, obj_version, box, stride, decimate_method, timeout)
+    return(obj_response(request, data, box, stride, decimate_method, media_type))
+
+@router.get("/obj/{obj_name}/{obj_version}",
+            summary="Retrieve a DataSpaces object with a cacheable request"
+)
+async def ds_get_cacheable(
+    request: Request,
+    obj_name: Annotated[
+        str,
+        Path(
+            title="Object name",
+            description="Object name to query",
+            max_length=96
+        )
+    ],
+    obj_version: Annotated[
+        int,
+        Path(
+            title="Object version",
+            description="Object version to retrieve",
+            ge=0
+        )
+    ],
+    compact_box: Annotated[
+        str,
+        Query(
+            alias="box",
+            title="Bounding box",
+            description="Bounding box as comma-separated start:span pairs, e.g. 0:16,0:16"
         )
+    ],
+    namespace: Annotated[
+        str,
+        Query(
+            title="Request namespace",
+            description="Request namespace which defines the context of the query",
+            max_length=48
+        )
+    ] = None,
+    stride: Annotated[
+        str,
+        Query(
+            title="Decimation stride",
+            description="Comma-separated per-dimension stride, or a single stride for all dimensions",
+            pattern=r"^\d+(,\d+)*$"
+        )
+    ] = None,
+    decimate_method: Annotated[
+        Literal[DECIMATE_METHODS],
+        Query(
+            alias="method",
+            title="Decimation method",
+            description="'sample' to keep every stride-th element, 'mean' to average stride-sized blocks"
+        )
+    ] = 'sample',
+    timeout: WaitTimeout = 0
+):
+    """
+    Query DataSpaces for a data object, with the whole request in the URL \
+    so that responses can be stored by HTTP caches. This takes the same \
+    parameters and returns the same response as the POST form, except \
+    that **box** must be given in the compact `start:span,start:span` form \
+    as a query parameter.
+
+    Responses carry a strong **ETag**, derived from the request and the \
+    returned data (for objects too large for the object cache, from the \
+    request and the data's type and shape), and `Cache-Control: no-cache`, so that caches revalidate \
+    them before reuse. A request whose **If-None-Match** lists the current \
+    tag is answered with 304 Not Modified; if the tag was computed \
+    recently, the backend is not contacted at all. A put to the same \
+    object version through the API changes its tags. Deployments whose \
+    object versions are never rewritten can enable `immutable` responses \
+    in the API's configuration, which caches reuse without revalidating.
+
+    Raises
+    ------
+    **HTTPException** if the object is not found in DataSpaces
+    """
+    obj_name = obj_name.replace("~", "/")
+    box = get_request_box(None, compact_box, None)
+    media_type = negotiate_format(request.headers.get('accept'))
+    name = nspace_name(namespace, obj_name)
+    identity = (name, obj_version, box.lb, box.ub, stride, decimate_method if stride else None, media_type)
+    if dspaces_settings.dspaces_immutable_reads:
+        cache_control = f'public, max-age={dspaces_settings.dspaces_read_max_age}, immutable'
+    else:
+        cache_control = 'no-cache'
+    headers = {'Cache-Control': cache_control}
+    memo = get_etag_memo()
+    generation = get_cache().generation(name, obj_version)
+    etag = memo.get(identity, generation)
+    if_none_match = request.headers.get('if-none-match')
+    if etag is None or not etag_matches(if_none_match, etag):
+        if stride is None:
+            response = await range_obj_response(request, namespace, obj_name, obj_version, box, media_type, headers, etag, timeout,
+                                                identity, generation)
+            if response is not None:
+                return(response)
+            # the tag of a large object may have been derived on the way
+            etag = etag or memo.get(identity, generation)
+    if etag is None or not etag_matches(if_none_match, etag):
+        data, parsed_stride = await fetch_obj(namespace, obj_name, obj_version, box, stride, decimate_method, timeout)
+        if etag is None:
+            if data.nbytes > get_cache().max_bytes:
+                etag = compute_meta_etag(identity, data.dtype, data.shape, generation)
+            elif data.nbytes > dspaces_settings.dspaces_stream_chunk_size:
+                etag = await asyncio.to_thread(compute_etag, identity, data)
+            else:
+                etag = compute_etag(identity, data)
+            memo.put(identity, generation, etag)
+    matched = etag_matches(if_none_match, etag)
+    if matched is not None:
+        memo.count_not_modified()
+        headers['ETag'] = matched
+        headers['Vary'] = 'Accept, Accept-Encoding'
+        return(Response(status_code=304, headers=headers))
+    return(obj_response(request, data, box, parsed_stride, decimate_method, media_type, headers, etag))
+
+async def fetch_obj(namespace: str, name: str, version: int, box: BoundingBox | Corners, stride: str | None, decimate_method: str,
+                    timeout: int = 0):
+    '''
+    Fetch an object for a read request, decimating it if asked to
+
+    Returns
+    -------
+    The array, and the parsed stride or None
+
+    Raises
+    ------
+    HTTPException
+        With status 404 if the object is not found, or 400 if the stride is \
+        invalid for it
+    '''
+    data = await read_obj(namespace, name, version, box, timeout)
     if data is None:
         raise HTTPException(status_code=404, detail="could not find the object")
-    return(Response(
-            content=data.tobytes(),
-            headers={
-                'X-DS-Tag': str(data.dtype.num),
-                'X-DS-Element-Size': str(data.itemsize),
-                'X-DS-Lower-Bounds': ','.join([str(b.start) for b in box.bounds]),
-                'X-DS-Upper-Bounds': ','.join([str(b.start+sp-1) for (b,sp) in zip(box.bounds, data.shape)]),
-                'X-DS-Dims': ','.join([str(x) for x in data.shape])
-            },
-            media_type='application/octet-stream'
+    if stride is not None:
+        try:
+            stride = parse_stride(stride, data.ndim)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        data = await asyncio.to_thread(decimate, data, stride, decimate_method)
+    return(data, stride)
+
+def obj_response(request: Request, data, box: BoundingBox | Corners, stride, decimate_method: str, media_type: str,
+                 headers: dict = None, etag: str = None) -> Response:
+    '''
+    Build the response to an object read: the requested byte range if any, \
+        or the whole serialized object, compressed if the client accepts it
+
+    Parameters
+    ----------
+    headers
+        Additional response headers
+    etag
+        The unquoted entity tag of the response, if it has one. A Range \
+            request whose If-Range does not match it gets the whole object.
+    '''
+    headers = dict(headers or {})
+    headers.update(get_obj_headers(data, box, stride, decimate_method))
+    headers['Accept-Ranges'] = 'bytes'
+    headers['Vary'] = 'Accept'
+    parts = serialize_obj(data, media_type, get_obj_meta(data, box, stride, decimate_method))
+    size = sum([part.nbytes for part in parts])
+    range_header = request.headers.get('range')
+    if_range = request.headers.get('if-range')
+    if range_header is not None and (etag is None or if_range is None or if_range == format_etag(etag)):
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            raise HTTPException(
+                status_code=416,
+                detail="requested range not satisfiable",
+                headers={'Content-Range': f'bytes */{size}'}
+            )
+        if byte_range is not None:
+            start, end = byte_range
+            headers['Content-Range'] = f'bytes {start}-{end-1}/{size}'
+            headers['Content-Length'] = str(end - start)
+            if etag is not None:
+                headers['ETag'] = format_etag(etag)
+            return(StreamingResponse(
+                    iter_parts(parts, dspaces_settings.dspaces_stream_chunk_size, start, end),
+                    status_code=206,
+                    headers=headers,
+                    media_type=media_type
+                )
+            )
+    return(encoded_response(
+            iter_parts(parts, dspaces_settings.dspaces_stream_chunk_size),
+            size,
+            headers,
+            media_type,
+            request.headers.get('accept-encoding'),
+            etag
+        )
+    )
+
+async def range_obj_response(request: Request, namespace: str, name: str, version: int, box: BoundingBox | Corners,
+                             media_type: str, headers: dict = None, etag: str = None, timeout: int = 0,
+                             identity: tuple = None, generation: int = None) -> Response | None:
+    '''
+    Answer a Range request for an object too large for the object cache by \
+        reading only the slab of whole leading-dimension rows that holds \
+        the range, rather than the whole object
+
+    Parameters
+    ----------
+    headers
+        Additional response headers
+    etag
+        The unquoted entity tag of the object, if known
+    identity, generation
+        The response identity and write generation of a cacheable read. \
+            If given and etag is not, the tag is derived from the object's \
+            metadata and added to the tag memo. Otherwise a request with an \
+            If-Range is served from the whole object.
+
+    Returns
+    -------
+    The 206 response, or None if the request is to be served from the \
+        whole object: it has no usable Range, is not for an octet-stream, \
+        the object is cached or small enough to be, its If-Range does not \
+        match, or its If-None-Match does, to be answered with 304
+
+    Raises
+    ------
+    HTTPException
+        With status 416 if the range is not satisfiable
+    '''
+    range_header = request.headers.get('range')
+    if range_header is None or media_type != OCTET_STREAM:
+        return(None)
+    if_range = request.headers.get('if-range')
+    if if_range is not None and etag is None and identity is None:
+        return(None)
+    lb, ub = get_corners_from_bounds(box)
+    cache = get_cache()
+    if cache.get(nspace_name(namespace, name), version, lb, ub) is not None:
+        return(None)
+    # a single element gives the element type, and so the object's size
+    probe = await read_obj(namespace, name, version, Corners(lb, lb), timeout)
+    if probe is None or probe.size != 1:
+        return(None)
+    dims = get_box_dims(box)
+    size = get_box_volume(box) * probe.itemsize
+    if size <= cache.max_bytes:
+        return(None)
+    if etag is None and identity is not None:
+        etag = compute_meta_etag(identity, probe.dtype, dims, generation)
+        get_etag_memo().put(identity, generation, etag)
+        if etag_matches(request.headers.get('if-none-match'), etag):
+            return(None)
+    if if_range is not None and (etag is None or if_range != format_etag(etag)):
+        return(None)
+    try:
+        byte_range = parse_range(range_header, size)
+    except ValueError:
+        raise HTTPException(
+            status_code=416,
+            detail="requested range not satisfiable",
+            headers={'Content-Range': f'bytes */{size}'}
+        )
+    if byte_range is None:
+        return(None)
+    start, end = byte_range
+    first, last = get_range_rows(dims, probe.itemsize, start, end)
+    slab = await read_obj(namespace, name, version, Corners((lb[0] + first, *lb[1:]), (lb[0] + last - 1, *ub[1:])))
+    if slab is None or list(slab.shape) != [last - first, *dims[1:]]:
+        # the backend returned something other than the box, e.g. truncated
+        return(None)
+    offset = start - first * (size // dims[0])
+    headers = dict(headers or {})
+    headers.update(get_obj_headers(np.broadcast_to(probe.reshape(-1), dims), box))
+    headers['Accept-Ranges'] = 'bytes'
+    headers['Vary'] = 'Accept'
+    headers['Content-Range'] = f'bytes {start}-{end-1}/{size}'
+    headers['Content-Length'] = str(end - start)
+    if etag is not None:
+        headers['ETag'] = format_etag(etag)
+    return(StreamingResponse(
+            iter_parts([get_array_view(slab)[offset:offset + end - start]], dspaces_settings.dspaces_stream_chunk_size),
+            status_code=206,
+            headers=headers,
+            media_type=media_type
         )
     )
 
@@ -106,14 +583,8 @@ def ds_get(
             status_code=200,
             summary="Store a DataSpaces object"
 )
-def ds_put(
-    data: Annotated[
-       bytes,
-       File(
-            title="Object data",
-            description="Object data for storage"
-        )
-    ],
+async def ds_put(
+    request: Request,
     obj_name: Annotated[
         str,
         Path(
@@ -130,13 +601,6 @@ def ds_put(
             ge=0
         )
     ],
-    box: Annotated[
-        BoundingBox,
-        Form(
-            title="Bounding box",
-            description="Bounding box region in which to place data",
-        )
-    ],
     element_size: Annotated[
         int,
         Query(
@@ -153,6 +617,38 @@ def ds_put(
             gt=0
         )
     ],
+    data: Annotated[
+       bytes,
+       File(
+            title="Object data",
+            description="Object data for storage (multipart uploads)"
+        )
+    ] = None,
+    box: Annotated[
+        BoundingBox,
+        Form(
+            title="Bounding box",
+            description="Bounding box region in which to place data (multipart uploads)",
+        )
+    ] = None,
+    lower_bounds: Annotated[
+        str,
+        Header(
+            alias="X-DS-Lower-Bounds",
+            title="Lower bounds",
+            description="Comma-separated lower corner of the box (raw uploads)"
+        )
+    ] = None,
+    upper_bounds: Annotated[
+        str,
+        Header(
+            alias="X-DS-Upper-Bounds",
+            title="Upper bounds",
+            description="Comma-separated upper corner of the box (raw uploads)"
+        )
+    ] = None,
+    compact_box: CompactBox = None,
+    box_header: CompactBoxHeader = None,
     namespace: Annotated[
         str,
         Query(
@@ -164,6 +660,15 @@ def ds_put(
 ):
     """
     Store data to DataSpaces
+
+    Data can be sent either as a multipart form, with **data** and **box** \
+    fields, or as a raw `application/octet-stream` body. Raw bodies are \
+    streamed directly into an array preallocated from the box, which is \
+    given by the **X-DS-Lower-Bounds** and **X-DS-Upper-Bounds** headers \
+    (the same format returned by object reads). Raw bodies may be \
+    compressed, as given by their Content-Encoding. For either kind of \
+    upload, the box can instead be given in the compact `start:span` form \
+    of object reads, in the **box** query parameter or **X-DS-Box** header.
     
     Parameters
     ----------
@@ -182,41 +687,575 @@ def ds_put(
 
     Raises
     ------
-    **HTTPException** on failure.
+    **HTTPException** on failure. A raw body whose size does not match the \
+    box and element size is rejected with a 400 before it is fully read.
     """
+    codec = get_request_encoding(request)
+    if compact_box is not None or box_header is not None:
+        box = get_request_box(None, compact_box, box_header)
+    if data is None:
+        if box is None and (lower_bounds is None or upper_bounds is None):
+            raise HTTPException(status_code=422, detail="missing object data or bounds")
+        content_length = request.headers.get('content-length')
+        try:
+            if box is None:
+                box = parse_corners(lower_bounds, upper_bounds)
+            data = alloc_obj_array(box, element_size, element_type)
+            if content_length is not None:
+                if not content_length.strip().isdigit():
+                    raise ValueError("malformed Content-Length header")
+                content_length = int(content_length)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if codec is None:
+            stream = request.stream()
+            if content_length is not None and content_length != data.nbytes:
+                raise HTTPException(status_code=400, detail="data object does not match size parameters")
+        else:
+            stream = iter_decoded(request.stream(), codec)
+        try:
+            await read_into_array(stream, data)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    elif box is None:
+        raise HTTPException(status_code=422, detail="missing bounding box")
+    elif codec is not None:
+        raise HTTPException(status_code=415, detail="multipart uploads cannot be content encoded")
     try:
-        put_dspaces_obj(namespace, obj_name, obj_version, box, element_size, element_type, data)
+        await get_executor().run('Put', put_dspaces_obj, namespace, obj_name, obj_version, box, element_size, element_type, data)
+        notify_put(namespace, obj_name, obj_version, box)
         return {'message': "Stored data successfully"}
     except Exception as e:
         print(e)
         raise HTTPException(status_code=500, detail="put failed")
 
+@router.post("/batch/obj",
+             summary="Retrieve many DataSpaces objects"
+)
+async def ds_batch_get(
+    request: Request,
+    requests: Annotated[
+        RequestList,
+        Body(
+            title="Request list",
+            description="List of objects and bounding boxes to retrieve"
+        )
+    ]
+):
+    """
+    Query DataSpaces for many data objects in one round trip. The objects \
+    are fetched concurrently and returned as soon as each is available.
+
+    Parameters
+    ----------
+    - **requests**: a list of objects to retrieve, each with a **name**, \
+        optional **namespace**, **version**, and **bounds** as in the \
+        single object query.
+
+    Returns
+    -------
+    A stream of frames (`application/x-dspaces-frames`), one per request, in \
+    completion order. Each frame is a 4-byte big-endian header length, a \
+    JSON header, and the object data serialized in row major order. The \
+    header contains:
+
+    - **index**: the position of the request in the request list.
+    - **name**, **namespace**, **version**: the request identity.
+    - **status**: 200 on success, 404 if the object was not found, or 502 \
+        if the backend query failed, in which case **detail** describes \
+        the error.
+    - **tag**, **element_size**, **lower_bounds**, **upper_bounds**, \
+        **dims**: as the X-DS-* headers of the single object query \
+        (successful frames only).
+    - **length**: the number of data bytes that follow the header.
+
+    The stream as a whole is compressed if the request's Accept-Encoding \
+    allows it.
+
+    Raises
+    ------
+    **HTTPException** if the request list is longer than the configured \
+    batch limit.
+    """
+    reqs = requests.requests
+    if len(reqs) > dspaces_settings.dspaces_batch_max_items:
+        raise HTTPException(status_code=413, detail="too many requests in batch")
+
+    async def fetch(index, req, box):
+        try:
+            data = await read_obj(req.namespace, req.name, req.version, box)
+        except Exception as e:
+            return(index, box, None, e)
+        return(index, box, data, None)
+
+    tasks = [asyncio.create_task(fetch(i, req, BoundingBox(bounds=req.bounds))) for i, req in enumerate(reqs)]
+
+    async def frames():
+        try:
+            for task in asyncio.as_completed(tasks):
+                index, box, data, err = await task
+                req = reqs[index]
+                meta = {
+                    'index': index,
+                    'name': req.name,
+                    'namespace': req.namespace,
+                    'version': req.version
+                }
+                if err is not None:
+                    meta.update(status=502, detail=f'{type(err).__name__}: {err}')
+                elif data is None:
+                    meta.update(status=404, detail="could not find the object")
+                else:
+                    meta.update(status=200, **get_obj_meta(data, box))
+                async for chunk in iter_frame(meta, data, dspaces_settings.dspaces_stream_chunk_size):
+                    yield chunk
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return(encoded_response(
+            frames(),
+            None,
+            {'X-DS-Frames': str(len(reqs))},
+            FRAMES_MEDIA_TYPE,
+            request.headers.get('accept-encoding')
+        )
+    )
+
+@router.websocket("/replay/{obj_name}")
+async def ds_replay(
+    websocket: WebSocket,
+    obj_name: Annotated[
+        str,
+        Path(
+            title="Object name",
+            description="Object name to query",
+            max_length=96
+        )
+    ],
+    compact_box: Annotated[
+        str,
+        Query(
+            alias="box",
+            title="Bounding box",
+            description="Bounding box as comma-separated start:span pairs, e.g. 0:16,0:16"
+        )
+    ],
+    start: Annotated[
+        int,
+        Query(
+            title="First version",
+            description="First version to replay",
+            ge=0
+        )
+    ],
+    stop: Annotated[
+        int,
+        Query(
+            title="Last version",
+            description="Last version to replay, inclusive",
+            ge=0
+        )
+    ],
+    namespace: Annotated[
+        str,
+        Query(
+            title="Request namespace",
+            description="Request namespace which defines the context of the query",
+            max_length=48
+        )
+    ] = None,
+    window: Annotated[
+        int,
+        Query(
+            title="Prefetch window",
+            description="The number of versions fetched ahead of the client",
+            ge=1,
+            le=dspaces_settings.dspaces_replay_window
+        )
+    ] = dspaces_settings.dspaces_replay_window,
+    credit: Annotated[
+        int,
+        Query(
+            title="Initial credit",
+            description="The number of frames the client can take before it grants more, by default the window",
+            ge=0
+        )
+    ] = None,
+    timeout: WaitTimeout = 0
+):
+    """
+    Replay a range of versions of an object over a WebSocket, with the \
+    backend reads for upcoming versions made ahead of time, so that a \
+    time series streams at link bandwidth rather than one request round \
+    trip per version.
+
+    Parameters
+    ----------
+    - **namespace**: the namespace within which to search
+    - **obj_name**: the name of the object which to query
+    - **box**: the bounds to retrieve from every version, in the compact \
+        `start:span,start:span` form
+    - **start**, **stop**: the first and last version to replay
+    - **window**: (optional) how many versions to fetch ahead of the \
+        client, at most the configured limit (also the default)
+    - **credit**: (optional) how many frames the client can take before \
+        it grants more, by default the window
+    - **timeout**: (optional) how long to wait for each version to be \
+        stored if it is not yet, in milliseconds, as for object queries
+
+    Returns
+    -------
+    One binary message per version, in version order, in the frame layout \
+    of batch reads: a 4-byte big-endian header length, a JSON header, and \
+    the object data in row major order. The header holds **index**, \
+    **name**, **namespace**, **version**, **status** (200, 404 or 502, \
+    with a **detail** message on failure), the X-DS-* values as \
+    **tag**, **element_size**, **lower_bounds**, **upper_bounds** and \
+    **dims**, and the payload **length**. After the last version, a text \
+    message `{"done": true, "frames": n}` is sent and the socket closed.
+
+    Every frame uses one credit. While it has none left, the server stops \
+    sending; the client grants more by sending `{"credit": n}` text \
+    messages. Fetches still run up to the window ahead, so that frames are \
+    ready when credit arrives, bounding the server's buffering to the \
+    window.
+
+    Raises
+    ------
+    **WebSocketException** (close code 1008) if the box is malformed, the \
+    range is empty, or a credit message is invalid.
+    """
+    obj_name = obj_name.replace("~", "/")
+    if stop < start:
+        raise WebSocketException(code=1008, reason="stop precedes start")
+    try:
+        box = parse_box(compact_box)
+    except ValueError as e:
+        raise WebSocketException(code=1008, reason=str(e))
+    await websocket.accept()
+    credits = window if credit is None else credit
+    granted = asyncio.Event()
+
+    async def read_credits():
+        nonlocal credits
+        try:
+            while True:
+                try:
+                    msg = await websocket.receive_json()
+                except (ValueError, KeyError):
+                    msg = None
+                n = msg.get('credit') if isinstance(msg, dict) else None
+                if not isinstance(n, int) or n < 0:
+                    await websocket.close(code=1008, reason="credit must be a non-negative integer")
+                    return
+                credits += n
+                granted.set()
+        finally:
+            granted.set()
+
+    async def fetch(version):
+        try:
+            data = await read_obj(namespace, obj_name, version, box, timeout)
+        except Exception as e:
+            return(None, e)
+        return(data, None)
+
+    versions = iter(range(start, stop + 1))
+    pending = deque()
+    reader = asyncio.create_task(read_credits())
+    sent = 0
+    try:
+        while True:
+            while len(pending) < window and (version := next(versions, None)) is not None:
+                pending.append((version, asyncio.create_task(fetch(version))))
+            if not pending:
+                break
+            while credits == 0 and not reader.done():
+                granted.clear()
+                await granted.wait()
+            if reader.done():
+                reader.result()
+                return
+            version, task = pending.popleft()
+            data, err = await task
+            meta = {
+                'index': version - start,
+                'name': obj_name,
+                'namespace': namespace,
+                'version': version
+            }
+            if err is not None:
+                meta.update(status=502, detail=f'{type(err).__name__}: {err}')
+            elif data is None:
+                meta.update(status=404, detail="could not find the object")
+            else:
+                meta.update(status=200, **get_obj_meta(data, box))
+            if data is not None and data.nbytes > dspaces_settings.dspaces_stream_chunk_size:
+                frame = await asyncio.to_thread(encode_frame, meta, data)
+            else:
+                frame = encode_frame(meta, data)
+            await websocket.send_bytes(frame)
+            credits -= 1
+            sent += 1
+        await websocket.send_json({'done': True, 'frames': sent})
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        reader.cancel()
+        for _, task in pending:
+            task.cancel()
+
+@router.put("/batch/obj",
+            status_code=200,
+            summary="Store many DataSpaces objects"
+)
+async def ds_batch_put(
+    request: Request
+) -> dict:
+    """
+    Store many objects to DataSpaces in one request. The body is a stream \
+    of frames (`application/x-dspaces-frames`), in the same layout as the \
+    batch read response: a 4-byte big-endian header length, a JSON header, \
+    and the object data in row major order.
+
+    Each frame header must contain:
+
+    - **name**, **namespace** (optional), **version**: the object identity.
+    - **bounds**: a list of start, span pairs, as for a single object store.
+    - **element_size**, **element_type**: as for a single object store.
+    - **length**: the number of data bytes that follow the header.
+
+    Each frame is checked against its box volume and element size before \
+    its data is read. Valid frames are stored concurrently as they arrive, \
+    while invalid ones are skipped. The stream as a whole may be \
+    compressed, as given by its Content-Encoding.
+
+    Returns
+    -------
+    A dict whose **results** list holds, for every frame in order, its \
+    **index**, **name**, **namespace**, **version**, and a **status** of \
+    200 if it was stored, 400 or 422 if it was rejected, or 500 if the \
+    store failed, with a **detail** message on failure.
+
+    Raises
+    ------
+    **HTTPException** if the body is not a well-formed frame stream, or \
+    holds more frames than the configured batch limit. Frames before the \
+    error may already have been stored.
+    """
+    codec = get_request_encoding(request)
+    stream = request.stream() if codec is None else iter_decoded(request.stream(), codec)
+    reader = FrameReader(stream)
+    slots = asyncio.Semaphore(dspaces_settings.dspaces_batch_put_concurrency)
+    results = []
+    tasks = []
+
+    async def store(result, entry, box, data):
+        try:
+            await get_executor().run('Put', put_dspaces_obj, entry.namespace, entry.name, entry.version, box,
+                                     entry.element_size, entry.element_type, data)
+            notify_put(entry.namespace, entry.name, entry.version, box)
+            result['status'] = 200
+        except Exception as e:
+            result.update(status=500, detail=f'{type(e).__name__}: {e}')
+        finally:
+            slots.release()
+
+    try:
+        while (meta := await reader.read_header()) is not None:
+            length = meta.get('length')
+            if not isinstance(length, int) or length < 0:
+                raise ValueError("frame header has no valid length")
+            if len(results) == dspaces_settings.dspaces_batch_max_items:
+                raise HTTPException(status_code=413, detail="too many objects in batch")
+            result = {'index': len(results)}
+            result.update({k: meta.get(k) for k in ('name', 'namespace', 'version')})
+            results.append(result)
+            try:
+                entry = DSPutObject(**meta)
+            except ValidationError as e:
+                result.update(status=422, detail=str(e))
+                await reader.skip_payload(length)
+                continue
+            box = BoundingBox(bounds=entry.bounds)
+            if length != get_box_volume(box) * entry.element_size:
+                result.update(status=400, detail="data object does not match size parameters")
+                await reader.skip_payload(length)
+                continue
+            await slots.acquire()
+            try:
+                data = alloc_obj_array(box, entry.element_size, entry.element_type)
+            except ValueError as e:
+                slots.release()
+                result.update(status=400, detail=str(e))
+                await reader.skip_payload(length)
+                continue
+            try:
+                await reader.read_payload(get_array_view(data))
+            except BaseException:
+                slots.release()
+                raise
+            tasks.append(asyncio.create_task(store(result, entry, box, data)))
+    except ValueError as e:
+        await asyncio.gather(*tasks)
+        raise HTTPException(status_code=400, detail=f'malformed frame stream after {len(results)} frames: {e}')
+    except BaseException:
+        await asyncio.gather(*tasks)
+        raise
+    await asyncio.gather(*tasks)
+    return {'results': results}
+
+@router.post("/reduce/{obj_name}/{obj_version}",
+             status_code=200,
+             summary="Compute reductions over a DataSpaces object"
+)
+async def ds_reduce(
+    obj_name: Annotated[
+        str,
+        Path(
+            title="Object name",
+            description="Object name to query",
+            max_length=96
+        )
+    ],
+    obj_version: Annotated[
+        int,
+        Path(
+            title="Object version",
+            description="Object version to retrieve",
+            ge=0
+        )
+    ],
+    query: Annotated[
+        ReductionRequest,
+        Body(
+            title="Reduction request",
+            description="Bounding box region to reduce, and the reductions to compute"
+        )
+    ],
+    compact_box: CompactBox = None,
+    box_header: CompactBoxHeader = None,
+    namespace: Annotated[
+        str,
+        Query(
+            title="Request namespace",
+            description="Request namespace which defines the context of the query",
+            max_length=48
+        )
+    ] = None
+) -> dict:
+    """
+    Compute reductions over a data object next to the data, returning only \
+    the (small) results. Unlike the exec endpoints, only a fixed set of \
+    NumPy reductions can be run.
+
+    Parameters
+    ----------
+    - **namespace**: the namespace within which to search
+    - **obj_name**: the name of the object which to query
+    - **obj_version**: the version for which to query
+    - **bounds**: the geometric bounds to reduce over, as for an object \
+        query. May be omitted if the box is given in compact form instead.
+    - **reductions**: a list of reductions, each with:
+        - **op**: one of `sum`, `mean`, `min`, `max`, `std`, `percentile` or `histogram`.
+        - **axes**: (optional) the axes to reduce over; all axes if omitted.\
+            Not valid for `histogram`.
+        - **q**: the percentiles to compute, for `percentile`.
+        - **bins**, **range**: the number of bins (default 10) and value \
+            range (default the data range), for `histogram`.
+
+    Returns
+    -------
+    A dict whose **results** list holds, for each reduction in order, its \
+    **op** and **axes**, and either the **value** and its **shape** or, for \
+    histograms, the bin **counts** and **edges**. Non-finite values are \
+    returned as null.
+
+    Raises
+    ------
+    **HTTPException** if the object is not found in DataSpaces, or a \
+    reduction is invalid for the data.
+    """
+    obj_name = obj_name.replace("~", "/")
+    box = get_request_box(BoundingBox(bounds=query.bounds) if query.bounds is not None else None, compact_box, box_header)
+    data = await read_obj(namespace, obj_name, obj_version, box)
+    if data is None:
+        raise HTTPException(status_code=404, detail="could not find the object")
+    try:
+        results = await asyncio.to_thread(apply_reductions, data, query.reductions)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {'results': results}
+
 @router.get("/var/",
             status_code=200,
             summary="Get a list of stored variables"
 )
-def ds_get_vars() -> list[str]:
+async def ds_get_vars(
+    prefix: Annotated[
+        str,
+        Query(
+            title="Name prefix",
+            description="Only list variables whose name starts with this",
+            max_length=96
+        )
+    ] = '',
+    namespace: Annotated[
+        str,
+        Query(
+            title="Request namespace",
+            description="Only list variables in this namespace",
+            max_length=48
+        )
+    ] = None,
+    cursor: ListCursor = None,
+    limit: ListLimit = None
+) -> list[str]:
     """
     Get a list of variables stored in DataSpaces
 
+    Parameters
+    ----------
+    - **prefix**: (optional) only list variables whose name starts with this
+    - **namespace**: (optional) only list variables in this namespace. \
+        Their names are listed with the namespace, as `namespace\\name`.
+    - **limit**: (optional) list at most this many variables. If more \
+        match, the response has an **X-DS-Next-Cursor** header.
+    - **cursor**: (optional) the X-DS-Next-Cursor of the previous page
+
     Returns
     -------
-    A list of strings that hold the names of the variables storged in DataSpaces.
+    A list of strings that hold the names of the variables storged in \
+    DataSpaces, in sorted order.
+
+    The list is served from a snapshot that is refreshed in the background \
+    once older than the configured TTL, so variables stored by other \
+    DataSpaces clients may take that long to appear. Variables stored \
+    through the API appear immediately.
 
     Raises
     ------
-    **HTTPException** on failure.
+    **HTTPException** on failure, or if the cursor is malformed.
     """
-    vars = get_dspaces_vars()
-    if vars == None:
+    try:
+        vars = await get_listings().vars()
+    except ListingError:
         raise HTTPException(status_code=502, detail="query failed.")
-    return vars
+    if namespace:
+        prefix = nspace_name(namespace, prefix)
+    try:
+        page, next_cursor = page_vars(vars, prefix, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return json_response(page, headers=get_page_headers(next_cursor))
 
 @router.get("/var/{obj_name}",
             status_code=200,
             summary="Get a list of stored objects of a given variable name"
 )
-def ds_get_var_objs(
+async def ds_get_var_objs(
      obj_name: Annotated[
         str,
         Path(
@@ -232,7 +1271,26 @@ def ds_get_var_objs(
             description="Request namespace which defines the context of the query",
             max_length=48
         )
-    ] = None
+    ] = None,
+    min_version: MinVersion = 0,
+    max_version: MaxVersion = None,
+    fields: Annotated[
+        str,
+        Query(
+            title="Fields",
+            description="Comma-separated fields to return: any of name, namespace, version and bounds",
+            pattern=r"^\w+(,\w+)*$"
+        )
+    ] = None,
+    shape: Annotated[
+        Literal['objects', 'rows'],
+        Query(
+            title="Response shape",
+            description="'objects' for a list of dicts, 'rows' for a list of lists"
+        )
+    ] = 'objects',
+    cursor: ListCursor = None,
+    limit: ListLimit = None
 ) -> list[DSObject]:
     """
     Get a list of objects stored for a given variable name.
@@ -241,31 +1299,383 @@ def ds_get_var_objs(
     ----------
     - **namespace**: the namespace within which to search
     - **obj_name**: the name of the object to query
+    - **min_version**, **max_version**: (optional) only list objects in \
+        this range of versions, inclusive
+    - **fields**: (optional) the fields to return, e.g. `version,bounds`
+    - **shape**: (optional) `rows` to return each object as a list of its \
+        field values, in the order given by the **X-DS-Fields** header, \
+        with bounds as `[start, span]` pairs. This is much smaller for \
+        large variables.
+    - **limit**: (optional) list at most this many objects. If more \
+        match, the response has an **X-DS-Next-Cursor** header.
+    - **cursor**: (optional) the X-DS-Next-Cursor of the previous page
 
     Returns
     -------
-    A list of objects. Each object is a dict containing:
+    A list of objects, ordered by version and then by box. Each object is \
+    a dict containing:
     - **name** the object's variable name
     - **namespace** (optional) the object's namespace
     - **version** the object's version
     - **bounds** the upper and lower bounds of the object
 
+    The list is served from the variable's spatial index, as for object \
+    queries, which is refreshed in the background once older than the \
+    configured index TTL, so objects stored by other DataSpaces clients \
+    may take that long to appear. Objects stored through the API appear \
+    immediately.
+
     Raises
     ------
-    **HTTPException** on failure.
+    **HTTPException** on failure, if the variable has no objects, or if a \
+    field or the cursor is invalid.
     """
     obj_name = obj_name.replace("~", "/")
-    objs = get_dspaces_var_obj(namespace, obj_name)
+    names = ['name', 'namespace', 'version', 'bounds'] if fields is None else fields.split(',')
+    unknown = set(names) - {'name', 'namespace', 'version', 'bounds'}
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"unknown fields: {', '.join(sorted(unknown))}")
+    name = nspace_name(namespace, obj_name)
+    objs = (await get_index_catalog().get(name)).keys()
     if objs == []:
         raise HTTPException(status_code=404, detail="could not find any objects")
-    return(objs)
+    try:
+        page, next_cursor = page_objects(objs, min_version, max_version, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    headers = get_page_headers(next_cursor)
+    if shape == 'rows':
+        columns = {
+            'name': lambda version, lb, ub: name,
+            'namespace': lambda version, lb, ub: None,
+            'version': lambda version, lb, ub: version,
+            'bounds': lambda version, lb, ub: [[a, b - a + 1] for a, b in zip(lb, ub)]
+        }
+        getters = [columns[f] for f in names]
+        headers['X-DS-Fields'] = ','.join(names)
+        return(json_response([[get(*obj) for get in getters] for obj in page], headers=headers))
+    items = []
+    for version, lb, ub in page:
+        item = {
+            'name': name,
+            'namespace': None,
+            'version': version,
+            'bounds': [{'start': a, 'span': b - a + 1} for a, b in zip(lb, ub)]
+        }
+        items.append({f: item[f] for f in names})
+    return(json_response(items, headers=headers))
+
+@router.get("/var/{obj_name}/query",
+            status_code=200,
+            summary="Find the objects of a variable that intersect a box"
+)
+async def ds_query_var_objs(
+    obj_name: Annotated[
+        str,
+        Path(
+            title="Object name",
+            description="Object name to query",
+            max_length=96
+        )
+    ],
+    compact_box: IndexBox,
+    namespace: Annotated[
+        str,
+        Query(
+            title="Request namespace",
+            description="Request namespace which defines the context of the query",
+            max_length=48
+        )
+    ] = None,
+    min_version: MinVersion = 0,
+    max_version: MaxVersion = None
+) -> list[DSObject]:
+    """
+    Get the objects stored for a variable that intersect a box, from a \
+    spatial index of the variable's objects rather than the full list.
+
+    Parameters
+    ----------
+    - **namespace**: the namespace within which to search
+    - **obj_name**: the name of the object to query
+    - **box**: the box to search, in the compact `start:span,start:span` form
+    - **min_version**, **max_version**: (optional) the range of versions \
+        to search, inclusive
+
+    Returns
+    -------
+    A list of objects, ordered by version, in the format of the object list \
+    of a variable.
+
+    The index of a variable is built from DataSpaces on its first query, \
+    and then kept up to date with objects stored through the API; objects \
+    stored by other DataSpaces clients are picked up once the index is \
+    older than the configured TTL.
+
+    Raises
+    ------
+    **HTTPException** if the box is malformed, or no objects are found.
+    """
+    obj_name = obj_name.replace("~", "/")
+    box = get_request_box(None, compact_box, None)
+    name = nspace_name(namespace, obj_name)
+    var = await get_index_catalog().get(name)
+    keys = var.query(box.lb, box.ub, min_version, MAX_VERSION if max_version is None else max_version)
+    if not keys:
+        raise HTTPException(status_code=404, detail="could not find any objects")
+    return(json_response([
+        {
+            'name': name,
+            'namespace': None,
+            'version': version,
+            'bounds': [{'start': a, 'span': b - a + 1} for a, b in zip(lb, ub)]
+        }
+        for version, lb, ub in keys
+    ]))
+
+@router.get("/var/{obj_name}/versions",
+            status_code=200,
+            summary="Find the versions of a variable that intersect a box"
+)
+async def ds_query_var_versions(
+    obj_name: Annotated[
+        str,
+        Path(
+            title="Object name",
+            description="Object name to query",
+            max_length=96
+        )
+    ],
+    compact_box: IndexBox,
+    namespace: Annotated[
+        str,
+        Query(
+            title="Request namespace",
+            description="Request namespace which defines the context of the query",
+            max_length=48
+        )
+    ] = None,
+    min_version: MinVersion = 0,
+    max_version: MaxVersion = None
+) -> list[int]:
+    """
+    Get the versions of a variable that have data in a box, as for the \
+    object query.
+
+    Returns
+    -------
+    The sorted list of versions with at least one object intersecting the box.
+
+    Raises
+    ------
+    **HTTPException** if the box is malformed, or no objects are found.
+    """
+    obj_name = obj_name.replace("~", "/")
+    box = get_request_box(None, compact_box, None)
+    var = await get_index_catalog().get(nspace_name(namespace, obj_name))
+    keys = var.query(box.lb, box.ub, min_version, MAX_VERSION if max_version is None else max_version)
+    if not keys:
+        raise HTTPException(status_code=404, detail="could not find any objects")
+    return(json_response(sorted({version for version, _, _ in keys})))
+
+@router.get("/var/{obj_name}/coverage",
+            status_code=200,
+            summary="Summarize which parts of a box a version of a variable covers"
+)
+async def ds_var_coverage(
+    obj_name: Annotated[
+        str,
+        Path(
+            title="Object name",
+            description="Object name to query",
+            max_length=96
+        )
+    ],
+    compact_box: IndexBox,
+    version: Annotated[
+        int,
+        Query(
+            title="Object version",
+            description="Object version to summarize",
+            ge=0
+        )
+    ],
+    namespace: Annotated[
+        str,
+        Query(
+            title="Request namespace",
+            description="Request namespace which defines the context of the query",
+            max_length=48
+        )
+    ] = None,
+    max_gaps: Annotated[
+        int,
+        Query(
+            title="Maximum gaps",
+            description="The most uncovered regions to list",
+            ge=0,
+            le=10000
+        )
+    ] = 100
+) -> dict:
+    """
+    Summarize how much of a box has been stored for one version of a \
+    variable, using the variable's spatial index as for the object query.
+
+    Returns
+    -------
+    A dict containing:
+    - **volume** the number of elements in the box
+    - **covered** the number of those elements that lie in a stored object
+    - **fraction** covered / volume
+    - **objects** the number of stored objects that intersect the box
+    - **gaps** uncovered regions of the box, each a list of start, span \
+        pairs. Adjacent gaps are not merged.
+    - **gaps_truncated** whether there were more than max_gaps gaps
+
+    Raises
+    ------
+    **HTTPException** if the box is malformed, or the objects are too \
+    irregularly placed for coverage to be computed cheaply.
+    """
+    obj_name = obj_name.replace("~", "/")
+    box = get_request_box(None, compact_box, None)
+    var = await get_index_catalog().get(nspace_name(namespace, obj_name))
+    keys = var.query(box.lb, box.ub, version, version)
+    try:
+        coverage = await asyncio.to_thread(
+            get_coverage,
+            [(lb, ub) for _, lb, ub in keys],
+            box.lb,
+            box.ub,
+            dspaces_settings.dspaces_coverage_max_cells,
+            max_gaps
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    coverage['objects'] = len(keys)
+    coverage['gaps'] = [
+        [{'start': a, 'span': b - a + 1} for a, b in zip(lb, ub)]
+        for lb, ub in coverage['gaps']
+    ]
+    return(json_response(coverage))
+
+@router.get("/var/{obj_name}/watch",
+            summary="Watch a variable for new objects"
+)
+async def ds_watch_var(
+    request: Request,
+    obj_name: Annotated[
+        str,
+        Path(
+            title="Object name",
+            description="Variable name to watch",
+            max_length=96
+        )
+    ],
+    namespace: Annotated[
+        str,
+        Query(
+            title="Request namespace",
+            description="Request namespace which defines the context of the query",
+            max_length=48
+        )
+    ] = None,
+    since: Annotated[
+        int,
+        Query(
+            title="Since version",
+            description="Also report objects already stored with a version newer than this"
+        )
+    ] = None,
+    last_event_id: Annotated[
+        str,
+        Header(
+            alias="Last-Event-ID",
+            title="Last event ID",
+            description="Sent by EventSource clients on reconnection, used as since"
+        )
+    ] = None
+):
+    """
+    Subscribe to notifications of new objects of a variable, as a stream \
+    of server-sent events (`text/event-stream`), instead of polling the \
+    object list.
+
+    Parameters
+    ----------
+    - **namespace**: the namespace within which to watch
+    - **obj_name**: the name of the variable to watch
+    - **since**: (optional) first report the objects already stored with \
+        a version newer than this. EventSource clients that reconnect send \
+        the id of the last event they received, which is used if since is \
+        not given.
+
+    Returns
+    -------
+    A stream of `object` events, one for every new version or box of the \
+    variable. Each event's id is the object version, and its data a JSON \
+    object with **name**, **namespace**, **version**, **lb** and **ub**. \
+    Comment lines are sent periodically to keep idle connections open.
+
+    Objects stored through the API are reported as soon as they are \
+    stored; objects stored by other DataSpaces clients when the variable \
+    is next polled. However many clients watch a variable, the API polls \
+    the backend for it once per configured interval, and stops once the \
+    last client disconnects. A client that falls too far behind loses \
+    its oldest undelivered events.
+    """
+    obj_name = obj_name.replace("~", "/")
+    name = nspace_name(namespace, obj_name)
+    if since is None and last_event_id is not None:
+        try:
+            since = int(last_event_id)
+        except ValueError:
+            pass
+    hub = get_watch_hub()
+
+    async def events():
+        queue = await hub.subscribe(name, since, dspaces_settings.dspaces_ready_timeout)
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), dspaces_settings.dspaces_watch_heartbeat)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield b': keepalive\n\n'
+                    continue
+                data = dumps_json(dict(event, name=obj_name, namespace=namespace))
+                yield b'id: %d\nevent: object\ndata: %s\n\n' % (event['version'], data)
+        finally:
+            hub.unsubscribe(name, queue)
+
+    return(StreamingResponse(
+            events(),
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+            media_type='text/event-stream'
+        )
+    )
 
 if dspaces_settings.dspaces_unsafe_endpoints:
+    async def run_exec(op: str, service, **kwargs):
+        '''
+        Run a remote execution service, in the exec process pool if one is \
+            configured, or on the backend executor otherwise
+        '''
+        pool = get_exec_pool()
+        if pool is None:
+            return await get_executor().run(op, service, **kwargs)
+        try:
+            return await pool.run(service, **kwargs)
+        except ExecTimeout as e:
+            raise HTTPException(status_code=504, detail=str(e))
+
     @router.post("/exec/{obj_name}/{obj_version}",
                 status_code=200,
                 summary="Perform a single-argument remote execution"
                 )
-    def ds_pexec(
+    async def ds_pexec(
         fn: Annotated[
             bytes,
             File(
@@ -295,7 +1705,9 @@ if dspaces_settings.dspaces_unsafe_endpoints:
                 title="Bounding box",
                 description="Bounding box region to retrieve"
             )
-        ],
+        ] = None,
+        compact_box: CompactBox = None,
+        box_header: CompactBoxHeader = None,
         namespace: Annotated[
             str,
             Query(
@@ -317,7 +1729,8 @@ if dspaces_settings.dspaces_unsafe_endpoints:
             pairs. The first of the pair defines the start of an interval, and \
             the second the size of the interval. For example, [(1,2),(3,4)] \
             defines the rectangle that starts at (1,3) and has dimensions 2x4 \
-            elements.
+            elements. It can also be given in compact form, as for an \
+            object query.
         - **fn**: a dill pickled function that takes a single ndarray argument.\
             this function will be executed on the serve with the defined object \
             as its argumenet. 
@@ -328,10 +1741,14 @@ if dspaces_settings.dspaces_unsafe_endpoints:
 
         Raises
         ------
-        **HTTPException** on failure.
+        **HTTPException** on failure, or with status 504 if exec runs in a \
+        process pool and fn does not finish within the configured timeout.
         """
         obj_name = obj_name.replace("~", "/")
-        data = pexec_dspaces_obj(
+        box = get_request_box(box, compact_box, box_header)
+        data = await run_exec(
+                'Exec',
+                pexec_dspaces_obj,
                 namespace=namespace,
                 name=obj_name,
                 version=obj_version,
@@ -350,7 +1767,7 @@ if dspaces_settings.dspaces_unsafe_endpoints:
                 status_code=200,
                 summary="Perform a multi-argument remote execution"
                 )
-    def ds_mpexec(
+    async def ds_mpexec(
         fn: Annotated[
             bytes,
             File(
@@ -389,9 +1806,12 @@ if dspaces_settings.dspaces_unsafe_endpoints:
 
         Raises
         ------
-        **HTTPException** on failure.
+        **HTTPException** on failure, or with status 504 if exec runs in a \
+        process pool and fn does not finish within the configured timeout.
         """
-        data = mpexec_dspaces_obj(
+        data = await run_exec(
+            'VecExec',
+            mpexec_dspaces_obj,
             reqs = requests.requests,
             fn=fn
         )
@@ -407,7 +1827,7 @@ if dspaces_settings.dspaces_unsafe_endpoints:
             status_code=200,
             summary="Register a new data source"
             )
-def ds_reg(
+async def ds_reg(
     type: Annotated[
         str,
         Path(
@@ -454,10 +1874,72 @@ def ds_reg(
     **HTTPException** on failure.
     """
     try:
-        return(reg_dspaces(type, name, data))
+        return(await get_executor().run('Register', reg_dspaces, type, name, data))
     except DSModuleError:
         raise HTTPException(status_code=500, detail="invalid registration type")
     except DSRemoteFaultError:
         raise HTTPException(status_code=500, detail="plugin handling fault")
     except DSConnectionError:
-        raise HTTPException(status_code=500, detail="backend server connection failed")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="backend server connection failed")
+
+@router.get("/stats",
+            status_code=200,
+            summary="Get API load statistics"
+)
+async def ds_stats() -> dict:
+    """
+    Get statistics about the API's use of the DataSpaces backend
+
+    Returns
+    -------
+    A dict containing:
+    - **executor** the size of the backend worker pool and, per DSClient \
+        operation, its concurrency limit and the number of calls running \
+        and waiting
+    - **pool** the state of the DSClient connection pool: its size, idle \
+        and checked out clients, and counters for connections created and \
+        discarded, checkout timeouts and health probes
+    - **cache** the object read cache: its byte budget and usage, hits, \
+        misses, bytes served without a backend call, evictions and \
+        invalidations
+    - **single_flight** the number of backend reads made, and the number of \
+        requests that shared an identical read already in flight
+    - **encoding** per direction and codec, the number of compressed \
+        bodies, their identity and encoded sizes, compression ratio and \
+        CPU time spent
+    - **fn_cache** the number of deserialized exec functions cached, and \
+        cache hits, misses and evictions
+    - **etags** the number of entity tags of cacheable reads memoized, \
+        memo hits and misses, and 304 responses sent
+    - **watch** the number of watched variables and subscribers, and \
+        counters for backend polls, poll errors, events delivered and \
+        events dropped for subscribers that fell behind
+    - **index** the number of variables and objects in spatial indexes, \
+        and counters for index queries, loads from the backend, background \
+        loads and their errors
+    - **listings** counters for variable listings served from the \
+        snapshot, snapshot loads, background loads and their errors, and \
+        invalidations by puts
+    - **exec_pool** (if exec runs in a process pool) the number of worker \
+        processes, and counters for calls, timeouts and pool replacements
+    - **embedded** (with the embedded backend) the number of variables, \
+        versions and stored blocks, and their size in bytes
+    """
+    stats = {
+        'executor': get_executor().stats(),
+        'pool': get_pool().stats(),
+        'cache': get_cache().stats(),
+        'single_flight': get_single_flight().stats(),
+        'encoding': get_encoding_stats().stats(),
+        'fn_cache': get_fn_cache().stats(),
+        'etags': get_etag_memo().stats(),
+        'watch': get_watch_hub().stats(),
+        'index': get_index_catalog().stats(),
+        'listings': get_listings().stats()
+    }
+    pool = get_exec_pool()
+    if pool is not None:
+        stats['exec_pool'] = pool.stats()
+    if dspaces_settings.dspaces_backend == 'embedded':
+        stats['embedded'] = get_store().stats()
+    return stats
@@ -2,6 +2,7 @@ from .get_dspaces_obj import get_dspaces_obj
 from .put_dspaces_obj import put_dspaces_obj
 from .get_dspaces_vars import get_dspaces_vars
 from .get_dspaces_var_obj import get_dspaces_var_obj
+from .get_dspaces_var_keys import get_dspaces_var_keys
 from .pexec_dspaces_obj import pexec_dspaces_obj
 from .mpexec_dspaces_obj import mpexec_dspaces_obj
 from .reg_dspaces import reg_dspaces
@@ -10,6 +11,7 @@ __all__ = ['get_dspaces_obj',
            'put_dspaces_obj', 
            'get_dspaces_vars', 
            'get_dspaces_var_obj', 
+           'get_dspaces_var_keys',
            'pexec_dspaces_obj',
            'mpexec_dspaces_obj',
            'reg_dspaces']
\ No newline at end of file
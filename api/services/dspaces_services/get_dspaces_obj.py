@@ -1,14 +1,15 @@
 import numpy as np
 
-from api.helpers.dspaces_client import nspace_name, get_client
-from api.helpers.bounding_box import get_corners_from_bounds
+from api.helpers.dspaces_client import nspace_name, get_pool
+from api.helpers.obj_cache import get_cache
+from api.helpers.bounding_box import Corners, get_corners_from_bounds
 from api.models.dspaces_model import BoundingBox
 
 def get_dspaces_obj(
                 namespace:str, 
                 name:str, 
                 version:int, 
-                box: BoundingBox,
+                box: BoundingBox | Corners,
 ) -> np.ndarray | None:
     '''
     Get a data object from the DataSpaces server
@@ -26,9 +27,16 @@ def get_dspaces_obj(
 
     Returns
     -------
-    An ndarray containing the results, or None if there are no results
+    An ndarray containing the results, or None if there are no results. \
+        Results are added to the object cache, and so are read-only. Reads \
+        that the cache can answer should not reach this function; see \
+        api.helpers.reads.read_obj.
     '''
-    client = get_client()
     lb,ub = get_corners_from_bounds(box)
     name = nspace_name(namespace, name)
-    return(client.Get(name, version, lb, ub, 0))
+    cache = get_cache()
+    generation = cache.generation(name, version)
+    data = get_pool().call('Get', name, version, lb, ub, 0)
+    if data is not None:
+        cache.put(name, version, lb, ub, data, generation)
+    return(data)
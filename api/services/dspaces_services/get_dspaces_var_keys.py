@@ -0,0 +1,24 @@
+from api.helpers.dspaces_client import get_pool, nspace_name
+
+def get_dspaces_var_keys(
+        namespace: str,
+        name: str
+) -> list[tuple]:
+    """
+    Get the keys of all objects for a given variable, as get_dspaces_var_obj \
+        but without building a model per object
+
+    Parameters
+    ----------
+    namespace
+        The namespace of the request
+    name
+        The variable name
+
+    Returns
+    -------
+    The (version, lb, ub) of each object, sorted by version and then by box
+    """
+    name = nspace_name(namespace, name)
+    obj_list = get_pool().call('GetVarObjs', name)
+    return sorted([(obj.version, tuple(obj.lb), tuple(obj.ub)) for obj in obj_list])
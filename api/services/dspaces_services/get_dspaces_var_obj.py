@@ -1,6 +1,5 @@
-from api.helpers.dspaces_client import get_client, nspace_name
-from api.models.dspaces_model import DSObject
-from api.helpers.bounding_box import get_bounds_from_corners
+from api.helpers.dspaces_client import get_pool, nspace_name
+from api.models.dspaces_model import DSObject, Interval
 
 def get_dspaces_var_obj(
         namespace: str,
@@ -15,17 +14,19 @@ def get_dspaces_var_obj(
         The namespace of the request
     name
         The variable name
+
+    The objects are built without validation, since the backend's \
+        values are already well-formed.
     """
-    client = get_client()
     name = nspace_name(namespace, name)
-    obj_list = client.GetVarObjs(name)
+    obj_list = get_pool().call('GetVarObjs', name)
     objs = []
     for obj in obj_list:
         objs.append(
-            DSObject(
+            DSObject.model_construct(
                 name = obj.name,
                 version = obj.version,
-                bounds = get_bounds_from_corners(obj.lb, obj.ub)
+                bounds = [Interval.model_construct(start=a, span=(b-a)+1) for a,b in zip(obj.lb, obj.ub)]
             )
         )
     return(objs)
\ No newline at end of file
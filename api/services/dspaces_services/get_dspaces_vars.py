@@ -1,12 +1,14 @@
-from api.helpers.dspaces_client import get_client
+from api.helpers.dspaces_client import get_pool
 
-def get_dspaces_vars()->list[str]:
+def get_dspaces_vars()->list[str] | None:
     '''
     Get all the variables names stored in the DataSpaces server
 
     Returns
     -------
-    A list of names
+    A sorted list of names, or None if the backend returned none
     '''
-    client = get_client()
-    return client.GetVars()
+    names = get_pool().call('GetVars')
+    if names is None:
+        return None
+    return sorted(names)
@@ -1,16 +1,15 @@
-from api.helpers.dspaces_client import nspace_name, get_client
+from api.helpers.dspaces_client import nspace_name, get_pool
 from dspaces import DSObject as Request
 from api.models.dspaces_model import BoundingBox, DSObject
 from api.helpers.bounding_box import get_corners_from_bounds
+from api.helpers.fn_cache import get_fn_cache
 
-import dill
 import numpy as np
 
 def mpexec_dspaces_obj(
             reqs: list[DSObject],
             fn: bytes
         ) -> np.ndarray | None:
-    client = get_client()
     args = []
     for req in reqs:
         lb, ub = get_corners_from_bounds(BoundingBox(bounds=req.bounds))
@@ -21,7 +20,8 @@ def mpexec_dspaces_obj(
                 ub = ub
             )
         )
-    result = client.VecExec(args, dill.loads(fn))
+    result = get_pool().call('VecExec', args, get_fn_cache().load(fn))
+    import dill
     return(dill.dumps(result))
 
  
\ No newline at end of file
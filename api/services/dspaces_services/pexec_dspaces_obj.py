@@ -1,15 +1,15 @@
 import numpy as np
-import dill
 
-from api.helpers.dspaces_client import nspace_name, get_client
-from api.helpers.bounding_box import get_corners_from_bounds
+from api.helpers.dspaces_client import nspace_name, get_pool
+from api.helpers.bounding_box import Corners, get_corners_from_bounds
+from api.helpers.fn_cache import get_fn_cache
 from api.models.dspaces_model import BoundingBox
 
 def pexec_dspaces_obj(
                 namespace:str, 
                 name:str, 
                 version:int, 
-                box: BoundingBox,
+                box: BoundingBox | Corners,
                 fn: bytes
 ) -> np.ndarray | None:
     '''
@@ -29,14 +29,15 @@ def pexec_dspaces_obj(
         How long to wait for data to be available: -1 means\
               indefinitely, otherwise fail if not available
     fn
-        A dill serialized function to run on the data
+        A dill serialized function to run on the data. Deserialized \
+            functions are cached by content hash.
 
     Returns
     -------
     An ndarray containing the results, or None if there are no results
     '''
-    client = get_client()
     lb,ub = get_corners_from_bounds(box)
     name = nspace_name(namespace, name)
-    result = client.Exec(name, version, lb, ub, dill.loads(fn))
+    result = get_pool().call('Exec', name, version, lb, ub, get_fn_cache().load(fn))
+    import dill
     return(dill.dumps(result))
\ No newline at end of file
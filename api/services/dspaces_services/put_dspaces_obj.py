@@ -1,17 +1,19 @@
 import numpy as np
 
-from api.helpers.dspaces_client import get_client, nspace_name
+from api.helpers.dspaces_client import get_pool, nspace_name
 from api.models.dspaces_model import BoundingBox
-from api.helpers.bounding_box import get_box_volume
+from api.helpers.bounding_box import Corners, get_box_dims, get_box_volume, get_corners_from_bounds
+from api.helpers.obj_cache import get_cache
+from api.helpers.streaming import get_element_dtype
 
 def put_dspaces_obj(
         namespace: str,
         name: str,
         version: int,
-        box: BoundingBox,
+        box: BoundingBox | Corners,
         element_size: int,
         element_type: int,
-        data: bytes
+        data: bytes | np.ndarray
 ) -> None:
     '''
     Put a data object into the DataSpaces server
@@ -31,22 +33,22 @@ def put_dspaces_obj(
     element_type
         The type of the elements, referring NumPy scalar types
     data
-        An array of bytes containing the data to be written
+        A bytes-like object or preallocated array containing the data to be written
 
     Raises
     ------
     ValueError
         If the data does not contain the right number of bytes to fill the box with elements of the given size     
     '''
-    client = get_client()
-    offset = tuple([b.start for b in box.bounds])
-    if len(data) != get_box_volume(box) * element_size:
+    offset, _ = get_corners_from_bounds(box)
+    if memoryview(data).nbytes != get_box_volume(box) * element_size:
         raise ValueError("data object does not match size parameters")
-    dims = [b.span for b in box.bounds]
+    dims = get_box_dims(box)
     arr = np.ndarray(
         dims, 
-        dtype=np.sctypeDict[element_type],
+        dtype=get_element_dtype(element_type),
         buffer=data
     )
     name = nspace_name(namespace, name)
-    client.Put(arr, name, version, offset)
\ No newline at end of file
+    get_pool().call('Put', arr, name, version, offset)
+    get_cache().invalidate(name, version, *get_corners_from_bounds(box))
\ No newline at end of file
@@ -1,10 +1,9 @@
-from api.helpers.dspaces_client import get_client
+from api.helpers.dspaces_client import get_pool
 from api.models.dspaces_model import DSRegHandle
 
 def reg_dspaces(type: str, 
                 name: str, 
                 data: dict) -> DSRegHandle:
-    client = get_client()
-    return(client.Register(type, name, data))
+    return(get_pool().call('Register', type, name, data))
     
     
\ No newline at end of file
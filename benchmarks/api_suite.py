@@ -0,0 +1,322 @@
+'''
+Benchmark every API endpoint against an in-process stand-in backend
+
+The real FastAPI app is driven in process through httpx's ASGI transport,
+with the dspaces client replaced by benchmarks/fake_dspaces.py. Each
+endpoint is run over a matrix of array sizes, dimensionalities, dtypes and
+client concurrency levels, and each cell reports its throughput, latency
+percentiles and the process's peak RSS so far.
+
+The object cache is disabled by default so that reads reach the backend;
+pass --cache-mb to measure with it.
+
+Usage:
+    python benchmarks/api_suite.py [--sizes 4096 262144] [--ndims 1 3] \
+        [--dtypes float64 int32] [--concurrency 1 16] [--requests 64] \
+        [--latency-ms 1] [--bandwidth-mbps 0] [--endpoints get put ...] \
+        [--output results.json]
+
+    python benchmarks/api_suite.py --compare base.json new.json
+
+Prints (or writes) a JSON document with the run parameters and one result
+per endpoint and matrix cell. --compare prints, for each cell present in
+both documents, the ratio of the new throughput and latencies to the base.
+'''
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import fake_dspaces
+
+ENDPOINTS = [
+    'put', 'put_multipart', 'get', 'get_compact', 'get_npy', 'get_decimated', 'batch_get',
+    'batch_put', 'reduce', 'vars', 'var_objs', 'exec', 'mpexec', 'register',
+    'stats', 'metrics'
+]
+
+BATCH_SIZE = 8
+
+def percentile(samples, q):
+    return float(np.percentile(samples, q) * 1e3) if samples else None
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1 << 20) if sys.platform == 'darwin' else rss / (1 << 10)
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def get_shape(size, ndim):
+    side = max(int(round(size ** (1 / ndim))), 1)
+    return [side] * ndim
+
+def bounds(shape):
+    return [{'start': 0, 'span': s} for s in shape]
+
+def corners(shape):
+    return ','.join(['0'] * len(shape)), ','.join([str(s - 1) for s in shape])
+
+class Cell:
+    '''
+    The requests for one endpoint at one point of the matrix
+
+    Each request is built by a method named after its endpoint, which \
+        returns the keyword arguments to httpx.AsyncClient.request and the \
+        number of array bytes it moves.
+    '''
+    def __init__(self, shape, dtype, dill):
+        self.shape = shape
+        self.dtype = np.dtype(dtype)
+        self.data = np.arange(int(np.prod(shape)), dtype=self.dtype).reshape(shape)
+        self.nbytes = self.data.nbytes
+        self.name = f'bench_{self.dtype.name}_{"x".join(map(str, shape))}'
+        self.dill = dill
+
+    def put_headers(self):
+        lb, ub = corners(self.shape)
+        return {
+            'Content-Type': 'application/octet-stream',
+            'X-DS-Lower-Bounds': lb,
+            'X-DS-Upper-Bounds': ub
+        }
+
+    def put_params(self):
+        return {'element_size': self.dtype.itemsize, 'element_type': self.dtype.num}
+
+    def put(self, i):
+        return dict(method='PUT', url=f'/dspaces/obj/{self.name}/{i % BATCH_SIZE}',
+                    params=self.put_params(), headers=self.put_headers(),
+                    content=self.data.tobytes()), self.nbytes
+
+    def put_multipart(self, i):
+        return dict(method='PUT', url=f'/dspaces/obj/{self.name}/{i % BATCH_SIZE}',
+                    params=self.put_params(),
+                    files={'data': self.data.tobytes()},
+                    data={'box': json.dumps({'bounds': bounds(self.shape)})}), self.nbytes
+
+    def get(self, i, accept=None, params=None):
+        return dict(method='POST', url=f'/dspaces/obj/{self.name}/{i % BATCH_SIZE}',
+                    json={'bounds': bounds(self.shape)}, params=params,
+                    headers={'Accept': accept} if accept else None), self.nbytes
+
+    def get_compact(self, i):
+        return dict(method='POST', url=f'/dspaces/obj/{self.name}/{i % BATCH_SIZE}',
+                    params={'box': ','.join([f'0:{s}' for s in self.shape])}), self.nbytes
+
+    def get_npy(self, i):
+        return self.get(i, accept='application/x-npy')
+
+    def get_decimated(self, i):
+        stride = ','.join(['2'] * len(self.shape))
+        request, _ = self.get(i, params={'stride': stride, 'method': 'mean'})
+        return request, self.nbytes // (2 ** len(self.shape))
+
+    def batch_get(self, i):
+        return dict(method='POST', url='/dspaces/batch/obj', json={'requests': [
+            {'name': self.name, 'version': v, 'bounds': bounds(self.shape)} for v in range(BATCH_SIZE)
+        ]}), self.nbytes * BATCH_SIZE
+
+    def batch_put(self, i):
+        payload = self.data.tobytes()
+        frames = []
+        for v in range(BATCH_SIZE):
+            header = json.dumps({
+                'name': self.name,
+                'version': v,
+                'bounds': bounds(self.shape),
+                'element_size': self.dtype.itemsize,
+                'element_type': self.dtype.num,
+                'length': len(payload)
+            }).encode()
+            frames += [len(header).to_bytes(4, 'big'), header, payload]
+        return dict(method='PUT', url='/dspaces/batch/obj', content=b''.join(frames),
+                    headers={'Content-Type': 'application/x-dspaces-frames'}), self.nbytes * BATCH_SIZE
+
+    def reduce(self, i):
+        return dict(method='POST', url=f'/dspaces/reduce/{self.name}/{i % BATCH_SIZE}', json={
+            'bounds': bounds(self.shape),
+            'reductions': [{'op': 'sum'}, {'op': 'mean', 'axes': [0]}, {'op': 'histogram', 'bins': 64}]
+        }), self.nbytes
+
+    def vars(self, i):
+        return dict(method='GET', url='/dspaces/var/'), 0
+
+    def var_objs(self, i):
+        return dict(method='GET', url=f'/dspaces/var/{self.name}'), 0
+
+    def exec(self, i):
+        return dict(method='POST', url=f'/dspaces/exec/{self.name}/{i % BATCH_SIZE}',
+                    files={'fn': self.dill.dumps(np.sum)},
+                    data={'box': json.dumps({'bounds': bounds(self.shape)})}), self.nbytes
+
+    def mpexec(self, i):
+        reqs = [{'name': self.name, 'version': v, 'bounds': bounds(self.shape)} for v in range(2)]
+        return dict(method='POST', url='/dspaces/exec/',
+                    files={'fn': self.dill.dumps(np.add)},
+                    data={'requests': json.dumps({'requests': reqs})}), self.nbytes * 2
+
+    def register(self, i):
+        return dict(method='POST', url=f'/dspaces/register/bench/reg{i}', json={'path': '/dev/null'}), 0
+
+    def stats(self, i):
+        return dict(method='GET', url='/dspaces/stats'), 0
+
+    def metrics(self, i):
+        return dict(method='GET', url='/metrics'), 0
+
+async def run_cell(client, cell, endpoint, requests, concurrency):
+    build = getattr(cell, endpoint)
+    latencies = []
+    errors = 0
+    moved = 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors, moved
+        for i in counter:
+            request, nbytes = build(i)
+            start = time.perf_counter()
+            response = await client.request(**request)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+            else:
+                moved += nbytes
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    return {
+        'requests': requests,
+        'errors': errors,
+        'seconds': elapsed,
+        'throughput_rps': requests / elapsed,
+        'throughput_mbps': moved / elapsed / (1 << 20),
+        'p50_ms': percentile(latencies, 50),
+        'p99_ms': percentile(latencies, 99),
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+async def run(args):
+    import dill
+    import httpx
+    from api.main import app
+
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench', timeout=None) as client:
+            for size in args.sizes:
+                for ndim in args.ndims:
+                    for dtype in args.dtypes:
+                        fake_dspaces.reset()
+                        cell = Cell(get_shape(size, ndim), dtype, dill)
+                        # seed every version the read endpoints use
+                        for v in range(BATCH_SIZE):
+                            request, _ = cell.put(v)
+                            (await client.request(**request)).raise_for_status()
+                        for concurrency in args.concurrency:
+                            for endpoint in args.endpoints:
+                                result = {
+                                    'endpoint': endpoint,
+                                    'size': int(cell.data.size),
+                                    'shape': cell.shape,
+                                    'dtype': cell.dtype.name,
+                                    'concurrency': concurrency
+                                }
+                                result.update(await run_cell(client, cell, endpoint, args.requests, concurrency))
+                                results.append(result)
+                                print(f"{endpoint:>14} {cell.dtype.name:>8} {'x'.join(map(str, cell.shape)):>14} "
+                                      f"c={concurrency:<3} {result['throughput_rps']:9.1f} req/s "
+                                      f"p50 {result['p50_ms']:8.2f} ms p99 {result['p99_ms']:8.2f} ms "
+                                      f"errors {result['errors']}", file=sys.stderr)
+    return results
+
+def cell_key(result):
+    return (result['endpoint'], result['size'], tuple(result['shape']), result['dtype'], result['concurrency'])
+
+def compare(base_path, new_path):
+    with open(base_path) as f:
+        base = {cell_key(r): r for r in json.load(f)['results']}
+    with open(new_path) as f:
+        new = json.load(f)['results']
+    rows = []
+    for result in new:
+        old = base.get(cell_key(result))
+        if old is None:
+            continue
+        row = {k: result[k] for k in ('endpoint', 'size', 'shape', 'dtype', 'concurrency')}
+        for metric in ('throughput_rps', 'p50_ms', 'p99_ms', 'peak_rss_mb'):
+            row[metric] = result[metric] / old[metric] if old[metric] else None
+        rows.append(row)
+    return {'base': base_path, 'new': new_path, 'ratios': rows}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[4096, 262144],
+                        help='elements per object')
+    parser.add_argument('--ndims', type=int, nargs='+', default=[1, 3])
+    parser.add_argument('--dtypes', nargs='+', default=['float64', 'int32'])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 16])
+    parser.add_argument('--requests', type=int, default=64,
+                        help='requests per endpoint and cell')
+    parser.add_argument('--endpoints', nargs='+', default=ENDPOINTS, choices=ENDPOINTS)
+    parser.add_argument('--latency-ms', type=float, default=1.0,
+                        help='simulated backend latency per call')
+    parser.add_argument('--bandwidth-mbps', type=float, default=0.0,
+                        help='simulated backend bandwidth in MiB/s; 0 for unlimited')
+    parser.add_argument('--cache-mb', type=int, default=0)
+    parser.add_argument('--output', help='write the results here instead of stdout')
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'NEW'),
+                        help='compare two result files instead of running')
+    args = parser.parse_args()
+
+    if args.compare:
+        print(json.dumps(compare(*args.compare), indent=2))
+        return
+
+    fake_dspaces.install(
+        latency=args.latency_ms / 1e3,
+        bandwidth=args.bandwidth_mbps * (1 << 20) or None
+    )
+    os.environ['DSPACES_UNSAFE_ENDPOINTS'] = 'true'
+    os.environ['DSPACES_CACHE_BYTES'] = str(args.cache_mb << 20)
+    # the stand-in backend doesn't connect anywhere
+    os.environ['DSPACES_SERVER_IP'] = '127.0.0.1'
+
+    results = asyncio.run(run(args))
+    report = {
+        'benchmark': 'api_suite',
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'params': {k: v for k, v in vars(args).items() if k not in ('output', 'compare')},
+        'results': results
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+'''
+An in-memory stand-in for the dspaces client module
+
+The module provides the subset of the dspaces Python API that the REST API
+uses: DSClient with Put, Get, GetVars, GetVarObjs, Exec, VecExec and
+Register, DSObject, and the client exception types. Objects are kept in
+process memory, and Get assembles the requested box from every stored
+object of the same name and version that overlaps it, as the server does.
+
+Each call sleeps for a fixed latency, and calls that move data also sleep
+for the time the data would take at a given bandwidth, so that the API's
+overheads can be measured against a backend with known costs.
+
+Call install() before anything imports dspaces (i.e. before importing api).
+'''
+import sys
+import threading
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+class DSConnectionError(Exception):
+    pass
+
+class DSRemoteFaultError(Exception):
+    pass
+
+class DSModuleError(Exception):
+    pass
+
+@dataclass
+class DSObject:
+    name: str
+    version: int
+    lb: tuple
+    ub: tuple
+
+class _Backend:
+    def __init__(self):
+        self.latency = 0.0
+        self.bandwidth = None
+        self.lock = threading.Lock()
+        self.objects = {}
+
+    def delay(self, nbytes: int = 0):
+        seconds = self.latency
+        if self.bandwidth and nbytes:
+            seconds += nbytes / self.bandwidth
+        if seconds > 0:
+            time.sleep(seconds)
+
+_backend = _Backend()
+
+def configure(latency: float = 0.0, bandwidth: float = None):
+    '''
+    Set the simulated backend costs
+
+    Parameters
+    ----------
+    latency
+        Seconds added to every call
+    bandwidth
+        Bytes per second at which Put and Get data moves, or None for no limit
+    '''
+    _backend.latency = latency
+    _backend.bandwidth = bandwidth
+
+def reset():
+    '''
+    Drop every stored object
+    '''
+    with _backend.lock:
+        _backend.objects.clear()
+
+class DSClient:
+    def __init__(self, conn: str = None, **kwargs):
+        self.conn = conn
+
+    def Put(self, data: np.ndarray, name: str, version: int, offset: tuple):
+        data = np.array(data)
+        lb = tuple(offset)
+        ub = tuple([o + s - 1 for o, s in zip(offset, data.shape)])
+        _backend.delay(data.nbytes)
+        with _backend.lock:
+            objs = _backend.objects.setdefault((name, version), {})
+            objs.pop((lb, ub), None)
+            objs[(lb, ub)] = data
+
+    def Get(self, name: str, version: int, lb: tuple, ub: tuple, timeout: int) -> np.ndarray | None:
+        with _backend.lock:
+            objs = list(_backend.objects.get((name, version), {}).items())
+        result = None
+        for (olb, oub), data in objs:
+            if len(olb) != len(lb):
+                continue
+            ilb = [max(a, b) for a, b in zip(olb, lb)]
+            iub = [min(a, b) for a, b in zip(oub, ub)]
+            if any(a > b for a, b in zip(ilb, iub)):
+                continue
+            if result is None:
+                result = np.zeros([b - a + 1 for a, b in zip(lb, ub)], dtype=data.dtype)
+            dst = tuple([slice(a - c, b - c + 1) for a, b, c in zip(ilb, iub, lb)])
+            src = tuple([slice(a - c, b - c + 1) for a, b, c in zip(ilb, iub, olb)])
+            result[dst] = data[src]
+        _backend.delay(0 if result is None else result.nbytes)
+        return result
+
+    def GetVars(self) -> list[str]:
+        _backend.delay()
+        with _backend.lock:
+            return sorted({name for name, _ in _backend.objects})
+
+    def GetVarObjs(self, name: str) -> list[DSObject]:
+        _backend.delay()
+        with _backend.lock:
+            return [DSObject(name, version, lb, ub)
+                    for (oname, version), objs in _backend.objects.items() if oname == name
+                    for lb, ub in objs]
+
+    def Exec(self, name: str, version: int, lb: tuple, ub: tuple, fn):
+        return fn(self.Get(name, version, lb, ub, 0))
+
+    def VecExec(self, requests: list[DSObject], fn):
+        return fn(*[self.Get(r.name, r.version, r.lb, r.ub, 0) for r in requests])
+
+    def Register(self, type: str, name: str, data: dict) -> dict:
+        _backend.delay()
+        return {'namespace': type, 'parameters': dict(data, name=name)}
+
+def install(latency: float = 0.0, bandwidth: float = None):
+    '''
+    Make this module importable as dspaces and set its costs
+    '''
+    configure(latency, bandwidth)
+    sys.modules['dspaces'] = sys.modules[__name__]
@@ -0,0 +1,94 @@
+'''
+Benchmark the object cache on a nested-box access pattern
+
+Each round reads a full domain once and then many random sub-boxes inside it,
+which is how dashboards typically explore a new version. The backend is
+simulated by slicing an in-memory array after a fixed delay, so the numbers
+isolate the cost of the cache itself.
+
+Usage:
+    python benchmarks/nested_box_cache.py [--dims 128 128 128] [--rounds 4] \
+        [--subboxes 256] [--latency-ms 5]
+
+Prints a JSON document with the hit rate, backend calls and latency
+percentiles for the run.
+'''
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from api.helpers.obj_cache import ObjectCache
+
+def percentile(samples, q):
+    return float(np.percentile(samples, q) * 1e3) if samples else 0.0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dims', type=int, nargs='+', default=[128, 128, 128])
+    parser.add_argument('--rounds', type=int, default=4)
+    parser.add_argument('--subboxes', type=int, default=256)
+    parser.add_argument('--latency-ms', type=float, default=5.0)
+    parser.add_argument('--cache-mb', type=int, default=256)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    cache = ObjectCache(max_bytes=args.cache_mb << 20)
+    backend_calls = 0
+    latencies = []
+    hit_latencies = []
+
+    def read(name, version, lb, ub, domain):
+        nonlocal backend_calls
+        start = time.perf_counter()
+        data = cache.get(name, version, lb, ub)
+        hit = data is not None
+        if not hit:
+            generation = cache.generation(name, version)
+            time.sleep(args.latency_ms / 1e3)
+            backend_calls += 1
+            data = domain[tuple([slice(a, b+1) for a,b in zip(lb, ub)])].copy()
+            cache.put(name, version, lb, ub, data, generation)
+        elapsed = time.perf_counter() - start
+        latencies.append(elapsed)
+        if hit:
+            hit_latencies.append(elapsed)
+        return data
+
+    full_lb = tuple([0] * len(args.dims))
+    full_ub = tuple([d-1 for d in args.dims])
+    for version in range(args.rounds):
+        domain = rng.random(args.dims, dtype=np.float32)
+        read('bench', version, full_lb, full_ub, domain)
+        for _ in range(args.subboxes):
+            lb = tuple([int(rng.integers(0, d)) for d in args.dims])
+            ub = tuple([int(rng.integers(a, d)) for a,d in zip(lb, args.dims)])
+            data = read('bench', version, lb, ub, domain)
+            assert data.shape == tuple([b-a+1 for a,b in zip(lb, ub)])
+
+    stats = cache.stats()
+    requests = args.rounds * (args.subboxes + 1)
+    print(json.dumps({
+        'benchmark': 'nested_box_cache',
+        'params': vars(args),
+        'requests': requests,
+        'backend_calls': backend_calls,
+        'hit_rate': stats['hits'] / requests,
+        'containment_hits': stats['containment_hits'],
+        'latency_ms': {
+            'p50': percentile(latencies, 50),
+            'p99': percentile(latencies, 99),
+            'hit_p50': percentile(hit_latencies, 50),
+            'hit_p99': percentile(hit_latencies, 99)
+        },
+        'cache': stats
+    }, indent=2))
+
+if __name__ == '__main__':
+    main()